@@ -57,6 +57,26 @@ expr_grammar = Grammar[str, str](
 )
 
 
+### ambiguous equivalent of expr_grammar with operator precedence ###
+
+
+# not LR(1), the shift/reduce conflicts are resolved by the precedence levels,
+# so operands are not reduced through layers of unit productions
+flat_expr_grammar = Grammar[str, str](
+    ("E",),
+    ("x", "2", "(", ")", "+", "*"),
+    (
+        Production("E", (NT("E"), "+", NT("E")), lambda l, op, r: BinOp(l, op, r)),
+        Production("E", (NT("E"), "*", NT("E")), lambda l, op, r: BinOp(l, op, r)),
+        Production("E", ("x",), lambda x: Var(x)),
+        Production("E", ("2",), lambda two: Const(two)),
+        Production("E", ("(", NT("E"), ")"), lambda l, e, r: e),
+    ),
+    "E",
+    (Precedence("left", ("+",)), Precedence("left", ("*",))),
+)
+
+
 ### non-left-recursive equivalent of expr_grammar ###
 
 # LL(1) / LR(1) Grammar
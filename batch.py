@@ -0,0 +1,95 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+
+### batch parsing with a process pool ###
+
+
+"""
+Parsing many small inputs is dominated by preparing the parser (grammar
+transformations, analyses and tables) unless it is done once. A batch is
+parsed by a pool of worker processes that each call prepare(*args) once in
+their initializer and then parse chunks of the inputs with the returned
+function.
+
+prepare and args are pickled once per worker, so prepare must be a module
+level function. Grammars with lambdas as ext can not be pickled, they are
+rebuilt in the worker by importing their module, whereas tables computed in
+the parent (e.g. lalr_table) can be shipped in args.
+"""
+
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Failure:
+    """result for an input whose parse raised an exception"""
+
+    index: int
+    # name of the exception type, exceptions themselves need not be picklable
+    error: str
+    message: str
+
+
+# parse function of a worker process, set by initialize
+worker_parse: Optional[Callable[[Any], Any]] = None
+
+
+def initialize(
+    prepare: Callable[..., Callable[[T], Any]], args: tuple[Any, ...]
+) -> None:
+    global worker_parse
+    worker_parse = prepare(*args)
+
+
+def parse_chunk(chunk: tuple[int, list[Any]]) -> list[Any]:
+    if worker_parse is None:
+        raise Exception("worker is not initialized")
+    return parse_each(worker_parse, *chunk)
+
+
+def parse_each(parse: Callable[[T], Any], start: int, inputs: Iterable[T]) -> list[Any]:
+    results: list[Any] = []
+    for index, inp in enumerate(inputs, start):
+        try:
+            results.append(parse(inp))
+        except Exception as e:
+            results.append(Failure(index, type(e).__name__, str(e)))
+    return results
+
+
+def chunks(inputs: Iterable[T], size: int) -> Iterator[tuple[int, list[T]]]:
+    it = iter(inputs)
+    start = 0
+    while chunk := list(islice(it, size)):
+        yield start, chunk
+        start += len(chunk)
+
+
+def parse_batch(
+    prepare: Callable[..., Callable[[T], Any]],
+    inputs: Iterable[T],
+    args: tuple[Any, ...] = (),
+    workers: Optional[int] = None,
+    chunksize: int = 256,
+) -> list[Any]:
+    """results of prepare(*args)(inp) for all inputs in order, a Failure for the
+    inputs whose parse raised an exception
+
+    workers defaults to the number of cpus, with workers=0 the inputs are parsed
+    in this process.
+    """
+    if workers == 0:
+        return parse_each(prepare(*args), 0, inputs)
+    workers = workers or os.cpu_count() or 1
+    results: list[Any] = []
+    with ProcessPoolExecutor(
+        workers, initializer=initialize, initargs=(prepare, args)
+    ) as pool:
+        for chunk_results in pool.map(parse_chunk, chunks(inputs, chunksize)):
+            results += chunk_results
+    return results
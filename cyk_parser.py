@@ -0,0 +1,108 @@
+import numpy as np
+from grammar import *
+from grammar_cache import default_cache
+from grammar_transform import to_cnf
+from dataclasses import dataclass
+from indexed_grammar import *
+from scanner import Token
+from typing import Callable, Iterable
+
+
+### CYK recognizer with vectorized chart operations (requires numpy) ###
+
+
+"""
+chart[i, j] is the bitmap of the nonterminals (by index in the CNF grammar) that
+derive the input between i and j. All spans of the same length are computed at
+once: for every start and split point the bitmaps of the two halves are combined
+by a product with the tensor of the binary rules,
+
+    chart[i, i + l, A] = any over k, B, C of chart[i, k, B] & chart[k, i + l, C]
+                         & binary[B, C, A]
+
+which numpy evaluates as a single matrix product per span length.
+"""
+
+
+@dataclass(frozen=True)
+class CNFTables:
+    start: int
+    nonterminals: int
+    # terminal id of g (including unknown) -> bitmap of A with A -> terminal
+    lexical: np.ndarray
+    # (B * nonterminals + C) -> bitmap of A with A -> B C
+    binary: np.ndarray
+    accepts_empty: bool
+
+
+def build_cnf_tables(g: Grammar[NTS, TS]) -> CNFTables:
+    ig = index_grammar(g)
+    cnf = index_grammar(to_cnf(g))
+    n = len(cnf.nonterminals)
+    lexical = np.zeros((ig.unknown + 1, n), dtype=np.bool_)
+    binary = np.zeros((n * n, n), dtype=np.bool_)
+    accepts_empty = False
+    for production, rhs in enumerate(cnf.rhs):
+        a = cnf.lhs[production]
+        if len(rhs) == 2:
+            binary[~rhs[0] * n + ~rhs[1], a] = True
+        elif len(rhs) == 1:
+            lexical[ig.symbol(cnf.terminals[rhs[0]]), a] = True
+        else:
+            accepts_empty = True
+    return CNFTables(cnf.start, n, lexical, binary, accepts_empty)
+
+
+def cnf_tables(g: Grammar[NTS, TS]) -> CNFTables:
+    return default_cache.lookup("cnf_tables", g, 0, lambda: build_cnf_tables(g))
+
+
+def chart_accepts(tables: CNFTables, kinds: list[int]) -> bool:
+    size = len(kinds)
+    if size == 0:
+        return tables.accepts_empty
+    n = tables.nonterminals
+    binary = tables.binary.astype(np.float32)
+    chart = np.zeros((size + 1, size + 1, n), dtype=np.bool_)
+    starts = np.arange(size)
+    chart[starts, starts + 1] = tables.lexical[kinds]
+    for length in range(2, size + 1):
+        starts = np.arange(size - length + 1)
+        splits = np.arange(1, length)
+        left = chart[starts[:, None], starts[:, None] + splits]
+        right = chart[starts[:, None] + splits, starts[:, None] + length]
+        # pairs[s, B, C]: some split of the span starting at s derives B C
+        pairs = np.einsum(
+            "skb,skc->sbc", left.astype(np.float32), right.astype(np.float32)
+        )
+        derived = pairs.reshape(len(starts), n * n) @ binary
+        chart[starts, starts + length] = derived > 0
+    return bool(chart[0, size, tables.start])
+
+
+def recognize(
+    g: Grammar[NTS, TS], inp: Iterable[TS], eq: Callable[[TS, TS], bool] = equality
+) -> bool:
+    kind = classifier(index_grammar(g), eq)
+    return chart_accepts(cnf_tables(g), list(map(kind, inp)))
+
+
+def recognize_all(
+    g: Grammar[NTS, TS],
+    inputs: Iterable[Iterable[TS]],
+    eq: Callable[[TS, TS], bool] = equality,
+) -> list[bool]:
+    """batch conformance check, the tables are built once"""
+    tables = cnf_tables(g)
+    kind = classifier(index_grammar(g), eq)
+    return [chart_accepts(tables, list(map(kind, inp))) for inp in inputs]
+
+
+# convenience
+def recognize_from_string(g: Grammar[NTS, str], inp: str) -> bool:
+    return recognize(g, inp, equality)
+
+
+# convenience
+def recognize_from_tokens(g: Grammar[NTS, Token], inp: Iterable[Token]) -> bool:
+    return recognize(g, inp, token_equality)
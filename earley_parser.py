@@ -0,0 +1,189 @@
+from grammar import *
+from grammar_analysis import calculate_empty
+from indexed_grammar import *
+from scanner import Token
+from sppf import *
+from typing import Callable, Iterable, Optional
+
+
+### Earley parser ###
+
+
+"""
+Earley set j contains the pairs (item, origin) such that the rhs prefix of the
+item derives the input between origin and j. Predictions use the precomputed
+nt_closure of the indexed grammar and nullable nonterminals are skipped when
+they are predicted (Aycock and Horspool), so completions never have to look
+back into the set that is currently built.
+
+Leo's optimization: if set i contains exactly one item waiting for A and that
+item is penultimate (A is the last symbol of its rhs), the completion of A is
+deterministic. The topmost item of such a chain of deterministic completions is
+memoized per (i, A) and added directly, so right recursion takes linear time.
+The skipped items are not derivations of interest for recognition, but they
+are nodes of the parse forest, hence Leo's optimization is only used by the
+recognizer.
+"""
+
+
+Item = tuple[int, int]
+
+
+def earley_sets(
+    g: Grammar[NTS, TS], ig: IndexedGrammar[NTS, TS], kinds: list[int], leo: bool
+) -> tuple[list[dict[Item, None]], list[dict[int, set[int]]]]:
+    """returns the Earley sets and for every set the origins of the completed
+    nonterminals (by index)"""
+    empty = calculate_empty(g)
+    nullable = [empty[n] for n in ig.nonterminals]
+    next_symbol, lhs = ig.next_symbol, ig.lhs
+    start = ig.start
+    sets: list[dict[Item, None]] = [{} for _ in range(len(kinds) + 1)]
+    completed: list[dict[int, set[int]]] = [{} for _ in range(len(kinds) + 1)]
+    # set -> nonterminal -> items waiting for the nonterminal
+    waiting: list[dict[int, list[Item]]] = [{} for _ in range(len(kinds) + 1)]
+    leo_items: dict[tuple[int, int], Optional[Item]] = {}
+
+    def leo_item(i: int, n: int) -> Optional[Item]:
+        # only computed for sets that are complete
+        key = (i, n)
+        if key not in leo_items:
+            leo_items[key] = None
+            candidates = waiting[i].get(n, [])
+            if len(candidates) == 1 and next_symbol[candidates[0][0] + 1] is None:
+                item, origin = candidates[0]
+                above = lhs[ig.production(item)]
+                # the start symbol is never skipped, it decides acceptance
+                top = None
+                if above != start or origin != 0:
+                    top = leo_item(origin, above)
+                leo_items[key] = top if top is not None else (item + 1, origin)
+        return leo_items[key]
+
+    for j in range(len(kinds) + 1):
+        current = sets[j]
+        if j == 0:
+            for item in ig.nt_closure[start]:
+                current[(item, 0)] = None
+        worklist = list(current)
+        predicted: set[int] = set()
+
+        def add(entry: Item) -> None:
+            if entry not in current:
+                current[entry] = None
+                worklist.append(entry)
+
+        while worklist:
+            item, origin = worklist.pop()
+            sym = next_symbol[item]
+            if sym is None:
+                n = lhs[ig.production(item)]
+                completed[j].setdefault(n, set()).add(origin)
+                top = leo_item(origin, n) if leo and origin < j else None
+                if top is not None:
+                    add(top)
+                elif origin < j:
+                    for waiting_item, waiting_origin in waiting[origin].get(n, []):
+                        add((waiting_item + 1, waiting_origin))
+            elif sym < 0:
+                waiting[j].setdefault(~sym, []).append((item, origin))
+                if ~sym not in predicted:
+                    predicted.add(~sym)
+                    for predicted_item in ig.nt_closure[~sym]:
+                        add((predicted_item, j))
+                if nullable[~sym]:
+                    add((item + 1, origin))
+        if j < len(kinds):
+            for item, origin in current:
+                if next_symbol[item] == kinds[j]:
+                    sets[j + 1][(item + 1, origin)] = None
+    return sets, completed
+
+
+def recognize(
+    g: Grammar[NTS, TS], inp: Iterable[TS], eq: Callable[[TS, TS], bool] = equality
+) -> bool:
+    ig = index_grammar(g)
+    kinds = list(map(classifier(ig, eq), inp))
+    sets, completed = earley_sets(g, ig, kinds, True)
+    return 0 in completed[len(kinds)].get(ig.start, set())
+
+
+def build_forest(
+    ig: IndexedGrammar[NTS, TS],
+    tokens: list[TS],
+    kinds: list[int],
+    sets: list[dict[Item, None]],
+    completed: list[dict[int, set[int]]],
+) -> SPPF[NTS, TS]:
+    """builds the nodes reachable from the root top-down from the Earley sets"""
+    root = SymbolNode(~ig.start, 0, len(kinds))
+    forest = SPPF(ig, tokens, root)
+
+    def splits(production: int, position: int, i: int, j: int) -> list[Family]:
+        if position == 0:
+            return [Family(production, None, None)] if i == j else []
+        sym = ig.rhs[production][position - 1]
+        prefix = ig.item(production, position - 1)
+        if sym >= 0:
+            middles = [j - 1] if j > i and kinds[j - 1] == sym else []
+        else:
+            middles = sorted(k for k in completed[j].get(~sym, set()) if k >= i)
+        return [
+            Family(
+                production,
+                IntermediateNode(prefix, i, k) if position > 1 else None,
+                SymbolNode(sym, k, j),
+            )
+            for k in middles
+            if (prefix, i) in sets[k]
+        ]
+
+    worklist: list[Node] = [root]
+    while worklist:
+        node = worklist.pop()
+        if node in forest.families:
+            continue
+        families: list[Family] = []
+        if isinstance(node, IntermediateNode):
+            families = splits(
+                ig.production(node.item), ig.position(node.item), node.start, node.end
+            )
+        elif node.symbol < 0:
+            for production in ig.by_lhs[~node.symbol]:
+                complete = ig.item(production, len(ig.rhs[production]))
+                if (complete, node.start) in sets[node.end]:
+                    families += splits(
+                        production, len(ig.rhs[production]), node.start, node.end
+                    )
+        forest.families[node] = families
+        for family in families:
+            for child in (family.left, family.right):
+                if child is not None and child not in forest.families:
+                    worklist.append(child)
+    return forest
+
+
+def parse(
+    g: Grammar[NTS, TS], inp: Iterable[TS], eq: Callable[[TS, TS], bool] = equality
+) -> Optional[SPPF[NTS, TS]]:
+    """returns the forest of all derivations or None if inp is not in the language"""
+    ig = index_grammar(g)
+    tokens = list(inp)
+    kinds = list(map(classifier(ig, eq), tokens))
+    sets, completed = earley_sets(g, ig, kinds, False)
+    if 0 not in completed[len(kinds)].get(ig.start, set()):
+        return None
+    return build_forest(ig, tokens, kinds, sets, completed)
+
+
+# convenience
+def parse_from_string(g: Grammar[NTS, str], inp: str) -> Optional[SPPF[NTS, str]]:
+    return parse(g, inp, equality)
+
+
+# convenience
+def parse_from_tokens(
+    g: Grammar[NTS, Token], inp: Iterable[Token]
+) -> Optional[SPPF[NTS, Token]]:
+    return parse(g, inp, token_equality)
@@ -0,0 +1,189 @@
+from grammar import *
+from grammar_cache import default_cache
+from indexed_grammar import *
+from lalr_tables import lalr_actions
+from lr_tables import Actions, LR0Automaton, lr_0_automaton
+from scanner import Token
+from sppf import *
+from typing import Callable, Iterable, Iterator, Optional
+
+
+### GLR parser with a graph structured stack ###
+
+
+"""
+The parser follows all actions of the (multi-valued) LALR(1) action map. Stacks
+are shared in a graph structured stack (GSS): a node is a state at an input
+position and an edge points to the node below it, labeled with the forest node
+of the symbol in between. Every level has at most one node per state, so
+forks that reach the same state are merged again.
+
+Reductions are done on paths of the GSS. When an edge is added to a node that
+already exists, reductions are repeated for the paths through the new edge
+(Farshi), which is needed for nullable nonterminals. Derivations are shared in
+a binarized SPPF (see sppf.py).
+"""
+
+
+class StackNode:
+    __slots__ = ("state", "level", "edges")
+
+    def __init__(self, state: int, level: int) -> None:
+        self.state = state
+        self.level = level
+        # node below -> forest node of the symbol between them
+        self.edges: dict[StackNode, Node] = {}
+
+
+Edge = tuple[StackNode, StackNode]
+
+
+def glr_actions(g: Grammar[NTS, TS]) -> tuple[LR0Automaton, Actions]:
+    def compute() -> tuple[LR0Automaton, Actions]:
+        ig = index_grammar(g)
+        automaton = lr_0_automaton(ig)
+        return automaton, lalr_actions(g, ig, automaton)
+
+    return default_cache.lookup("glr_actions", g, 1, compute)
+
+
+def paths(
+    v: StackNode, length: int, required: Optional[Edge]
+) -> Iterator[tuple[StackNode, list[Node]]]:
+    """nodes reachable by length edges with the labels (the rhs in order)"""
+    stack: list[tuple[StackNode, list[Node], bool]] = [(v, [], required is None)]
+    while stack:
+        node, labels, found = stack.pop()
+        if len(labels) == length:
+            if found:
+                yield node, labels[::-1]
+            continue
+        for below, label in node.edges.items():
+            stack.append((below, labels + [label], found or (node, below) == required))
+
+
+def add_derivation(
+    forest: SPPF[NTS, TS], production: int, parent: SymbolNode, children: list[Node]
+) -> None:
+    """adds children as a family of parent, binarized by intermediate nodes"""
+    ig = forest.ig
+    left: Optional[Node] = None
+    for position, child in enumerate(children[:-1], 1):
+        node = IntermediateNode(ig.item(production, position), parent.start, child.end)
+        family = Family(production, left, child)
+        forest.families.setdefault(node, [])
+        if family not in forest.families[node]:
+            forest.families[node].append(family)
+        left = node
+    family = Family(production, left, children[-1] if children else None)
+    forest.families.setdefault(parent, [])
+    if family not in forest.families[parent]:
+        forest.families[parent].append(family)
+
+
+def parse(
+    g: Grammar[NTS, TS], inp: Iterable[TS], eq: Callable[[TS, TS], bool] = equality
+) -> Optional[SPPF[NTS, TS]]:
+    """returns the forest of all derivations or None if inp is not in the language
+
+    g has to be start-separated (use function in grammar.py).
+    """
+    ig = index_grammar(g)
+    automaton, actions = glr_actions(g)
+    transitions = automaton.transitions
+    starts = ig.by_lhs[ig.start]
+    if len(starts) != 1 or len(ig.rhs[starts[0]]) != 1:
+        raise Exception("Grammar is not start-separated! (use function in grammar.py)")
+    start_production = starts[0]
+    tokens = list(inp)
+    kinds = list(map(classifier(ig, eq), tokens))
+    n = len(kinds)
+    forest = SPPF(ig, tokens, SymbolNode(ig.rhs[start_production][0], 0, n))
+    accepted = False
+
+    bottom = StackNode(0, 0)
+    frontier: dict[int, StackNode] = {0: bottom}
+    for level in range(n + 1):
+        kind = kinds[level] if level < n else ig.eof
+        reductions: list[tuple[StackNode, int, Optional[Edge]]] = []
+
+        def queue(v: StackNode, required: Optional[Edge]) -> None:
+            for action in actions[v.state].get(kind, []):
+                if action & 1:
+                    production = action >> 1
+                    # nullable reductions do not use edges
+                    if required is None or ig.rhs[production]:
+                        reductions.append((v, production, required))
+
+        for v in frontier.values():
+            queue(v, None)
+        while reductions:
+            v, production, required = reductions.pop()
+            length = len(ig.rhs[production])
+            for u, children in list(paths(v, length, required)):
+                if production == start_production:
+                    accepted |= u is bottom and level == n
+                    continue
+                nt = ig.lhs[production]
+                parent = SymbolNode(~nt, u.level, level)
+                add_derivation(forest, production, parent, children)
+                state = transitions[u.state][~nt]
+                w = frontier.get(state)
+                if w is None:
+                    w = frontier[state] = StackNode(state, level)
+                    w.edges[u] = parent
+                    queue(w, None)
+                elif u not in w.edges:
+                    w.edges[u] = parent
+                    # new paths through the new edge for all nodes of the level
+                    for x in list(frontier.values()):
+                        queue(x, (w, u))
+
+        if level == n:
+            break
+        shifted: dict[int, StackNode] = {}
+        leaf = SymbolNode(kind, level, level + 1)
+        for v in frontier.values():
+            for action in actions[v.state].get(kind, []):
+                if action & 1 == 0:
+                    w = shifted.setdefault(
+                        action >> 1, StackNode(action >> 1, level + 1)
+                    )
+                    w.edges[v] = leaf
+        if not shifted:
+            return None
+        forest.families.setdefault(leaf, [])
+        frontier = shifted
+
+    if not accepted:
+        return None
+    return prune(forest)
+
+
+def prune(forest: SPPF[NTS, TS]) -> SPPF[NTS, TS]:
+    """removes the nodes of dead stacks that are not reachable from the root"""
+    reachable: dict[Node, list[Family]] = {}
+    worklist: list[Node] = [forest.root]
+    while worklist:
+        node = worklist.pop()
+        if node in reachable:
+            continue
+        reachable[node] = forest.families.get(node, [])
+        for family in reachable[node]:
+            for child in (family.left, family.right):
+                if child is not None and child not in reachable:
+                    worklist.append(child)
+    forest.families = reachable
+    return forest
+
+
+# convenience
+def parse_from_string(g: Grammar[NTS, str], inp: str) -> Optional[SPPF[NTS, str]]:
+    return parse(g, inp, equality)
+
+
+# convenience
+def parse_from_tokens(
+    g: Grammar[NTS, Token], inp: Iterable[Token]
+) -> Optional[SPPF[NTS, Token]]:
+    return parse(g, inp, token_equality)
@@ -9,7 +9,7 @@ TS = TypeVar("TS")
 NTS = TypeVar("NTS", str, int)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NT(Generic[NTS]):
     nt: NTS
 
@@ -17,12 +17,22 @@ class NT(Generic[NTS]):
 Symbol = Union[NT[NTS], TS]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Production(Generic[NTS, TS]):
     lhs: NTS
     rhs: tuple[Symbol, ...]
     # should take len(rhs) arguments if present
     ext: Optional[Callable[..., Any]] = None
+    # terminal whose precedence the rule has (like %prec in yacc), defaults to the
+    # last terminal of rhs with a declared precedence
+    prec: Optional[TS] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Precedence(Generic[TS]):
+    # "left", "right" or "nonassoc"
+    associativity: str
+    terminals: tuple[TS, ...]
 
 
 @dataclass(frozen=True)
@@ -31,6 +41,8 @@ class Grammar(Generic[NTS, TS]):
     terminals: tuple[TS, ...]
     rules: tuple[Production[NTS, TS], ...]
     start: NTS
+    # precedence levels resolving LR conflicts, from lowest to highest
+    precedence: tuple[Precedence[TS], ...] = ()
 
     def productions_with_lhs(self, nts: NTS) -> list[Production]:
         return [rule for rule in self.rules if rule.lhs == nts]
@@ -43,4 +55,5 @@ def start_separated(g: Grammar[NTS, TS], new_start: NTS) -> Grammar[NTS, TS]:
         g.terminals,
         g.rules + (new_production,),
         new_start,
+        g.precedence,
     )
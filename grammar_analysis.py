@@ -1,5 +1,6 @@
 from grammar import *
 from dataclasses import dataclass
+from profiling import Profile
 from functools import partial, reduce
 from typing import Callable, Optional, Generic, TypeVar, cast
 
@@ -145,10 +146,19 @@ class GrammarAnalysis(Generic[NTS, TS, Element]):
                     r = self.concat(r, self.singleton([ts]))
         return r
 
-    def run(self, g: Grammar[NTS, TS]) -> dict[NTS, Element]:
+    def run(
+        self, g: Grammar[NTS, TS], profile: Optional[Profile] = None
+    ) -> dict[NTS, Element]:
         initial_map = self.initial_analysis(g)
         update_map = partial(self.update_analysis, g)
-        return fixed_point(initial_map, update_map, map_eq)
+        if profile is None:
+            return fixed_point(initial_map, update_map, map_eq)
+        name = type(self).__name__
+        with profile.phase(name):
+            counted_map = profile.counting(name, update_map)
+            result = fixed_point(initial_map, counted_map, map_eq)
+        profile.record_sizes(name, result)
+        return result
 
 
 Lookaheads = frozenset[tuple[TS, ...]]
@@ -0,0 +1,148 @@
+import os
+import pickle
+import hashlib
+import threading
+from grammar import *
+from grammar_analysis import *
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Optional, TypeVar, cast
+
+
+### content addressed cache for grammar analyses and parse tables ###
+
+
+# bump whenever the layout of a cached result changes, stale files are recomputed
+CACHE_VERSION = 2
+
+T = TypeVar("T")
+
+
+def symbol_key(sym: Symbol) -> tuple[str, str]:
+    match sym:
+        case NT(nt):
+            return ("NT", repr(nt))
+        case ts:
+            return (type(ts).__module__ + "." + type(ts).__qualname__, repr(ts))
+
+
+# grammars are hashable, so repeated parses with the same grammar skip rehashing
+@lru_cache(maxsize=1024)
+def fingerprint(g: Grammar[NTS, TS], k: int) -> str:
+    """stable hash of everything an analysis depends on (ext callables are excluded)"""
+    content = (
+        tuple(repr(n) for n in g.nonterminals),
+        tuple(symbol_key(t) for t in g.terminals),
+        tuple(
+            (
+                repr(r.lhs),
+                tuple(symbol_key(s) for s in r.rhs),
+                None if r.prec is None else symbol_key(r.prec),
+            )
+            for r in g.rules
+        ),
+        repr(g.start),
+        tuple(
+            (p.associativity, tuple(symbol_key(t) for t in p.terminals))
+            for p in g.precedence
+        ),
+        k,
+    )
+    return hashlib.sha256(repr(content).encode()).hexdigest()
+
+
+@dataclass
+class GrammarCache:
+    # results are additionally pickled to this directory if present
+    directory: Optional[str] = None
+    memory: dict[tuple[str, str], Any] = field(default_factory=dict)
+    # results are computed once even if several threads ask for them at once
+    lock: threading.RLock = field(
+        default_factory=threading.RLock, repr=False, compare=False
+    )
+
+    def path(self, kind: str, key: str) -> str:
+        return os.path.join(cast(str, self.directory), f"{kind}-{key}.pickle")
+
+    def load(self, kind: str, key: str) -> Optional[Any]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self.path(kind, key), "rb") as file:
+                version, value = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        return value if version == CACHE_VERSION else None
+
+    def store(self, kind: str, key: str, value: Any) -> None:
+        if self.directory is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # write to a temporary file first so readers never see partial results
+            tmp = self.path(kind, key) + f".{os.getpid()}.tmp"
+            with open(tmp, "wb") as file:
+                pickle.dump((CACHE_VERSION, value), file)
+            os.replace(tmp, self.path(kind, key))
+        except (OSError, pickle.PicklingError, AttributeError, TypeError):
+            # results that can not be pickled are only kept in memory
+            pass
+
+    def lookup(
+        self,
+        kind: str,
+        g: Grammar[NTS, TS],
+        k: int,
+        compute: Callable[[], T],
+        persistent: bool = True,
+    ) -> T:
+        """returns the cached result of compute for (kind, g, k) and computes it once otherwise
+
+        compute must not depend on the ext callables of g since they are not part
+        of the fingerprint. Results that are not persistent are only kept in memory.
+        """
+        key = (kind, fingerprint(g, k))
+        if key in self.memory:
+            return self.memory[key]
+        with self.lock:
+            if key in self.memory:
+                return self.memory[key]
+            value = self.load(*key) if persistent else None
+            if value is None:
+                value = compute()
+                if persistent:
+                    self.store(*key, value)
+            self.memory[key] = value
+            return value
+
+    def invalidate(self, g: Optional[Grammar[NTS, TS]] = None, k: int = 0) -> None:
+        """drops the results of g for k (or all results) from memory and disk"""
+        keys = [key for key in self.memory if g is None or key[1] == fingerprint(g, k)]
+        for key in keys:
+            del self.memory[key]
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".pickle") and (g is None or fingerprint(g, k) in name):
+                os.remove(os.path.join(self.directory, name))
+
+
+default_cache = GrammarCache(os.environ.get("GRAMMAR_CACHE_DIR"))
+
+
+### cached analyses ###
+
+
+def first_k_analysis(
+    g: Grammar[NTS, TS], k: int, cache: GrammarCache = default_cache
+) -> dict[NTS, Lookaheads]:
+    return cache.lookup("first_k", g, k, lambda: FirstKAnalysis[NTS, TS](k).run(g))
+
+
+def follow_k_analysis(
+    g: Grammar[NTS, TS], k: int, cache: GrammarCache = default_cache
+) -> dict[NTS, Lookaheads]:
+    first_k_nt = first_k_analysis(g, k, cache)
+    return cache.lookup(
+        "follow_k", g, k, lambda: FollowKAnalysis[NTS, TS](k, first_k_nt).run(g)
+    )
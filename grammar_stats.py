@@ -0,0 +1,68 @@
+import sys
+import importlib
+from grammar import *
+from grammar_analysis import *
+from grammar_transform import fresh_nonterminal
+from indexed_grammar import *
+from ll_k_parser import build_ll_table
+from lr_0_parser import reducable_items
+from lr_tables import lr_0_automaton, resolve, slr_actions
+from lalr_tables import lalr_actions
+from lr_1_tables import build_lr_1_table
+from profiling import Profile
+
+
+### statistics and profile of the analyses of a grammar ###
+
+
+def grammar_profile(g: Grammar[NTS, TS], k: int) -> Profile:
+    """the conflicts of the LR(0) automaton and those recorded by the LL(k),
+    SLR(1), LALR(1) and LR(1) tables are counted (as "<name> conflicts")"""
+    profile = Profile()
+    profile.count("nonterminals", len(g.nonterminals))
+    profile.count("terminals", len(g.terminals))
+    profile.count("productions", len(g.rules))
+    profile.count("rhs symbols", sum(len(rule.rhs) for rule in g.rules))
+    first_k = FirstKAnalysis[NTS, TS](k).run(g, profile)
+    FollowKAnalysis[NTS, TS](k, first_k).run(g, profile)
+    # without profile, the analyses above are not counted twice
+    ll_table = build_ll_table(g, k)
+    profile.count(f"LL({k}) conflicts", len(ll_table.conflicts))
+    if len(g.productions_with_lhs(g.start)) != 1:
+        g = start_separated(g, fresh_nonterminal(g.nonterminals, g.start))
+    ig = index_grammar(g)
+    with profile.phase("LR(0) item sets"):
+        automaton = lr_0_automaton(ig, profile)
+    profile.count("LR(0) conflicts", 0)
+    for i, state in enumerate(automaton.states):
+        reducable = reducable_items(ig, state)
+        shiftable = any(
+            sym is not None and sym >= 0
+            for sym in map(ig.next_symbol.__getitem__, state)
+        )
+        if len(reducable) + shiftable > 1:
+            profile.count("LR(0) conflicts")
+            profile.conflict(
+                f"LR(0) state {i}: {len(reducable)} reductions, shift {shiftable}"
+            )
+    tables = []
+    with profile.phase("SLR(1) table"):
+        follow_1 = FollowKAnalysis[NTS, TS](1, FirstKAnalysis[NTS, TS](1).run(g)).run(g)
+        actions = slr_actions(ig, automaton, follow_1)
+        tables.append(resolve(ig, automaton, actions, "SLR(1)", profile))
+    with profile.phase("LALR(1) table"):
+        actions = lalr_actions(g, ig, automaton, profile)
+        tables.append(resolve(ig, automaton, actions, "LALR(1)", profile))
+    tables.append(build_lr_1_table(g, profile))
+    for table in tables:
+        profile.count(f"{table.name} conflicts", len(table.conflicts))
+    return profile
+
+
+if __name__ == "__main__":
+    # e.g. python grammar_stats.py arithmetics_parser.expr_grammar 1
+    name = sys.argv[1] if len(sys.argv) > 1 else "arithmetics_parser.expr_grammar"
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    module, attribute = name.rsplit(".", 1)
+    g = getattr(importlib.import_module(module), attribute)
+    print(grammar_profile(g, k).to_json())
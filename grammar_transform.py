@@ -0,0 +1,384 @@
+from grammar import *
+from grammar_analysis import *
+from itertools import product
+from typing import Callable
+
+
+### grammar transformations preserving semantic actions ###
+
+
+def value(rule: Production[NTS, TS], args: tuple[Any, ...]) -> Any:
+    # parsers use None as construct of a rule without ext
+    return None if rule.ext is None else rule.ext(*args)
+
+
+def fresh_nonterminal(nonterminals: tuple[NTS, ...], base: NTS) -> NTS:
+    if isinstance(base, int):
+        return cast(NTS, max(cast(tuple[int, ...], nonterminals), default=0) + 1)
+    name = base + "'"
+    while name in nonterminals:
+        name += "'"
+    return cast(NTS, name)
+
+
+def substitute(
+    outer: Production[NTS, TS], position: int, inner: Production[NTS, TS]
+) -> Production[NTS, TS]:
+    """replaces the nonterminal at position in outer by the rhs of inner"""
+    n = len(inner.rhs)
+    rhs = outer.rhs[:position] + inner.rhs + outer.rhs[position + 1 :]
+    # a precedence declared by inner (e.g. of a unit chain end) wins
+    prec = outer.prec if inner.prec is None else inner.prec
+    if outer.ext is None:
+        return Production(outer.lhs, rhs, None, prec)
+    outer_ext = outer.ext
+
+    def ext(*args):
+        inner_value = value(inner, args[position : position + n])
+        return outer_ext(*args[:position], inner_value, *args[position + n :])
+
+    return Production(outer.lhs, rhs, ext, prec)
+
+
+### useless symbols ###
+
+
+def productive_nonterminals(g: Grammar[NTS, TS]) -> frozenset[NTS]:
+    def update(productive: frozenset[NTS]) -> frozenset[NTS]:
+        return productive | frozenset(
+            rule.lhs
+            for rule in g.rules
+            if all(nt in productive for nt in nonterminals_of(rule.rhs))
+        )
+
+    return fixed_point(frozenset(), update, lambda x, y: x == y)
+
+
+def reachable_nonterminals(g: Grammar[NTS, TS]) -> frozenset[NTS]:
+    def update(reachable: frozenset[NTS]) -> frozenset[NTS]:
+        return reachable | frozenset(
+            nt
+            for rule in g.rules
+            if rule.lhs in reachable
+            for nt in nonterminals_of(rule.rhs)
+        )
+
+    return fixed_point(frozenset([g.start]), update, lambda x, y: x == y)
+
+
+def nonterminals_of(alpha: tuple[Symbol, ...]) -> list[NTS]:
+    return [sym.nt for sym in alpha if isinstance(sym, NT)]
+
+
+def restrict(g: Grammar[NTS, TS], keep: frozenset[NTS]) -> Grammar[NTS, TS]:
+    keep = keep | {g.start}
+    rules = tuple(
+        rule
+        for rule in g.rules
+        if rule.lhs in keep and all(nt in keep for nt in nonterminals_of(rule.rhs))
+    )
+    return Grammar(
+        tuple(n for n in g.nonterminals if n in keep),
+        g.terminals,
+        rules,
+        g.start,
+        g.precedence,
+    )
+
+
+def reduce_grammar(g: Grammar[NTS, TS]) -> Grammar[NTS, TS]:
+    """removes non-productive and afterwards unreachable nonterminals with their rules"""
+    g = restrict(g, productive_nonterminals(g))
+    return restrict(g, reachable_nonterminals(g))
+
+
+### epsilon rules ###
+
+
+def empty_values(g: Grammar[NTS, TS]) -> dict[NTS, Callable[[], Any]]:
+    """constructs the value of an empty derivation for every nullable nonterminal"""
+    values: dict[NTS, Callable[[], Any]] = {}
+
+    def empty_value(rule: Production[NTS, TS]) -> Callable[[], Any]:
+        args = [values[nt] for nt in nonterminals_of(rule.rhs)]
+        return lambda: value(rule, tuple(arg() for arg in args))
+
+    changed = True
+    while changed:
+        changed = False
+        for rule in g.rules:
+            if rule.lhs not in values and all(
+                isinstance(sym, NT) and sym.nt in values for sym in rule.rhs
+            ):
+                values[rule.lhs] = empty_value(rule)
+                changed = True
+    return values
+
+
+def omit(
+    rule: Production[NTS, TS],
+    omitted: tuple[int, ...],
+    values: dict[NTS, Callable[[], Any]],
+) -> Production[NTS, TS]:
+    """removes the nullable symbols at positions omitted from rule"""
+    rhs = tuple(sym for i, sym in enumerate(rule.rhs) if i not in omitted)
+    if rule.ext is None or not omitted:
+        return Production(rule.lhs, rhs, rule.ext, rule.prec)
+    rule_ext = rule.ext
+    fill = [
+        values[cast(NT, sym).nt] if i in omitted else None
+        for i, sym in enumerate(rule.rhs)
+    ]
+
+    def ext(*args):
+        it = iter(args)
+        return rule_ext(*[next(it) if f is None else f() for f in fill])
+
+    return Production(rule.lhs, rhs, ext, rule.prec)
+
+
+def eliminate_epsilon(g: Grammar[NTS, TS]) -> Grammar[NTS, TS]:
+    """removes all epsilon rules, only the start symbol may still derive epsilon"""
+    values = empty_values(g)
+    rules: list[Production[NTS, TS]] = []
+    for rule in g.rules:
+        nullable = [
+            i
+            for i, sym in enumerate(rule.rhs)
+            if isinstance(sym, NT) and sym.nt in values
+        ]
+        for choice in product([False, True], repeat=len(nullable)):
+            omitted = tuple(i for i, o in zip(nullable, choice) if o)
+            if len(omitted) < len(rule.rhs):
+                new_rule = omit(rule, omitted, values)
+                if new_rule.rhs not in [r.rhs for r in rules if r.lhs == rule.lhs]:
+                    rules.append(new_rule)
+    nonterminals, start = g.nonterminals, g.start
+    if g.start in values:
+        if any(g.start in nonterminals_of(rule.rhs) for rule in g.rules):
+            # a fresh start symbol keeps epsilon out of right-hand sides
+            start = fresh_nonterminal(nonterminals, g.start)
+            nonterminals += (start,)
+            rules.append(Production(start, (NT(g.start),), lambda s: s))
+        rules.append(Production(start, (), values[g.start]))
+    return Grammar(nonterminals, g.terminals, tuple(rules), start, g.precedence)
+
+
+### unit rules ###
+
+
+def is_unit(rule: Production[NTS, TS]) -> bool:
+    return len(rule.rhs) == 1 and isinstance(rule.rhs[0], NT)
+
+
+def unit_chains(g: Grammar[NTS, TS], nt: NTS) -> dict[NTS, list[Production[NTS, TS]]]:
+    """maps every nonterminal reachable from nt by unit rules to a shortest chain"""
+    chains: dict[NTS, list[Production[NTS, TS]]] = {nt: []}
+    worklist = [nt]
+    while worklist:
+        current = worklist.pop(0)
+        for rule in g.productions_with_lhs(current):
+            if is_unit(rule):
+                target = cast(NT, rule.rhs[0]).nt
+                if target not in chains:
+                    chains[target] = chains[current] + [rule]
+                    worklist.append(target)
+    return chains
+
+
+def eliminate_units(g: Grammar[NTS, TS]) -> Grammar[NTS, TS]:
+    """replaces chains of unit rules A -> B, B -> ... by direct rules for A"""
+    rules: list[Production[NTS, TS]] = []
+    for nt in g.nonterminals:
+        seen: set[tuple[Symbol, ...]] = set()
+        for target, chain in unit_chains(g, nt).items():
+            for rule in g.productions_with_lhs(target):
+                if is_unit(rule) or rule.rhs in seen:
+                    continue
+                seen.add(rule.rhs)
+                for unit in reversed(chain):
+                    rule = substitute(unit, 0, rule)
+                rules.append(rule)
+    return Grammar(g.nonterminals, g.terminals, tuple(rules), g.start, g.precedence)
+
+
+### left recursion ###
+
+
+def continue_with(rule: Production[NTS, TS]) -> Callable[..., Any]:
+    # A -> beta A' passes the value of beta to the continuation computed by A'
+    return lambda *args: args[-1](value(rule, args[:-1]))
+
+
+def accumulate_with(rule: Production[NTS, TS]) -> Callable[..., Any]:
+    # A' -> alpha A' extends the left operand by alpha and continues with A'
+    return lambda *args: lambda left: args[-1](value(rule, (left,) + args[:-1]))
+
+
+def eliminate_immediate_left_recursion(
+    g: Grammar[NTS, TS], nt: NTS
+) -> Grammar[NTS, TS]:
+    rules = g.productions_with_lhs(nt)
+    recursive = [r for r in rules if r.rhs[:1] == (NT(nt),)]
+    if not recursive:
+        return g
+    tail = fresh_nonterminal(g.nonterminals, nt)
+    with_ext = any(r.ext is not None for r in rules)
+    new_rules = [r for r in g.rules if r.lhs != nt]
+    for rule in rules:
+        if rule in recursive:
+            new_rules.append(
+                Production(
+                    tail,
+                    rule.rhs[1:] + (NT(tail),),
+                    accumulate_with(rule) if with_ext else None,
+                )
+            )
+        else:
+            new_rules.append(
+                Production(
+                    nt,
+                    rule.rhs + (NT(tail),),
+                    continue_with(rule) if with_ext else None,
+                )
+            )
+    new_rules.append(
+        Production(tail, (), (lambda: lambda left: left) if with_ext else None)
+    )
+    return Grammar(
+        g.nonterminals + (tail,), g.terminals, tuple(new_rules), g.start, g.precedence
+    )
+
+
+def eliminate_left_recursion(g: Grammar[NTS, TS]) -> Grammar[NTS, TS]:
+    """removes direct and indirect left recursion
+
+    The grammar must not contain epsilon rules (except for the start symbol) and
+    no cycles A =>+ A, both can be ensured by eliminate_epsilon and eliminate_units.
+    The values of the original rules are reconstructed by continuations, so the
+    resulting constructs are the same as for the original grammar.
+    """
+    order = g.nonterminals
+    for i, ai in enumerate(order):
+        for aj in order[:i]:
+            rules: list[Production[NTS, TS]] = []
+            for rule in g.rules:
+                if rule.lhs == ai and rule.rhs[:1] == (NT(aj),):
+                    rules += [
+                        substitute(rule, 0, r) for r in g.productions_with_lhs(aj)
+                    ]
+                else:
+                    rules.append(rule)
+            g = Grammar(
+                g.nonterminals, g.terminals, tuple(rules), g.start, g.precedence
+            )
+        g = eliminate_immediate_left_recursion(g, ai)
+    return g
+
+
+### Chomsky normal form ###
+
+
+def prepend(x: Any, rest: tuple[Any, ...]) -> tuple[Any, ...]:
+    return (x,) + rest
+
+
+def to_cnf(g: Grammar[NTS, TS]) -> Grammar[NTS, TS]:
+    """rules A -> B C, A -> a and S -> epsilon for the start symbol S only
+
+    Right-hand sides longer than two are split into chains of fresh nonterminals
+    whose constructs are the tuples of the collected arguments, so the constructs
+    of parses are preserved. The productions derived from a rule keep its
+    precedence (see lr_tables.py), made explicit since terminals are wrapped.
+    """
+    g = reduce_grammar(eliminate_units(eliminate_epsilon(reduce_grammar(g))))
+    nonterminals = list(g.nonterminals)
+
+    def fresh() -> NTS:
+        nt = fresh_nonterminal(tuple(nonterminals), g.start)
+        nonterminals.append(nt)
+        return nt
+
+    declared = {t for p in g.precedence for t in p.terminals}
+    wrappers: dict[TS, NTS] = {}
+    rules: list[Production[NTS, TS]] = []
+    for rule in g.rules:
+        if len(rule.rhs) <= 1:
+            rules.append(rule)
+            continue
+        prec = rule.prec
+        if prec is None:
+            last = [
+                sym for sym in rule.rhs if not isinstance(sym, NT) and sym in declared
+            ]
+            prec = last[-1] if last else None
+        symbols: list[Symbol] = []
+        for sym in rule.rhs:
+            if not isinstance(sym, NT):
+                if sym not in wrappers:
+                    wrappers[sym] = fresh()
+                    rules.append(Production(wrappers[sym], (sym,), lambda t: t))
+                sym = NT(wrappers[sym])
+            symbols.append(sym)
+        if len(symbols) == 2:
+            rules.append(Production(rule.lhs, tuple(symbols), rule.ext, prec))
+            continue
+        tails = [fresh() for _ in symbols[2:]]
+        collect = rule.ext is not None
+        rules.append(
+            Production(
+                rule.lhs,
+                (symbols[0], NT(tails[0])),
+                (
+                    (lambda x, rest, rule=rule: value(rule, prepend(x, rest)))
+                    if collect
+                    else None
+                ),
+                prec,
+            )
+        )
+        for i, tail in enumerate(tails[:-1]):
+            rules.append(
+                Production(
+                    tail,
+                    (symbols[i + 1], NT(tails[i + 1])),
+                    prepend if collect else None,
+                    prec,
+                )
+            )
+        rules.append(
+            Production(
+                tails[-1],
+                tuple(symbols[-2:]),
+                (lambda x, y: (x, y)) if collect else None,
+                prec,
+            )
+        )
+    return Grammar(
+        tuple(nonterminals), g.terminals, tuple(rules), g.start, g.precedence
+    )
+
+
+def is_cnf(g: Grammar[NTS, TS]) -> bool:
+    in_rhs = {nt for rule in g.rules for nt in nonterminals_of(rule.rhs)}
+    return all(
+        (len(rule.rhs) == 2 and all(isinstance(sym, NT) for sym in rule.rhs))
+        or (len(rule.rhs) == 1 and not isinstance(rule.rhs[0], NT))
+        or (len(rule.rhs) == 0 and rule.lhs == g.start and g.start not in in_rhs)
+        for rule in g.rules
+    )
+
+
+### pipeline ###
+
+
+def preprocess(g: Grammar[NTS, TS], left_recursion: bool = False) -> Grammar[NTS, TS]:
+    """shrinks g without changing the language or the constructs of parses
+
+    If left_recursion is set the result is free of left recursion (e.g. for LL(k)
+    parsing) instead of unit rules, since inlining the unit rules of a layered
+    expression grammar introduces common prefixes that no LL(k) parser can handle.
+    """
+    g = eliminate_epsilon(reduce_grammar(g))
+    g = eliminate_left_recursion(g) if left_recursion else eliminate_units(g)
+    return reduce_grammar(g)
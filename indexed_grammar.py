@@ -0,0 +1,287 @@
+from grammar import *
+from grammar_analysis import Lookaheads
+from scanner import Token
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+
+### integer encoding of grammars ###
+
+
+"""
+Terminals are numbered 0 .. len(terminals) - 1 followed by `eof` (end of input)
+and `unknown` (input symbols matching no terminal). The nonterminal with index n
+is encoded as ~n (i.e. as a negative number) and productions are numbered as in
+g.rules.
+
+An LR(0) item is a single int `production * stride + position`, where stride is
+larger than every right-hand side, so item + 1 is the item shifted by one symbol.
+"""
+
+
+def equality(x: TS, y: TS) -> bool:
+    return x == y
+
+
+def token_equality(x: Token, y: Token) -> bool:
+    return type(x) == type(y)
+
+
+def kind_equality(x: Token, y: Token) -> bool:
+    return x.kind == y.kind
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedGrammar(Generic[NTS, TS]):
+    grammar: Grammar[NTS, TS]
+    terminals: tuple[TS, ...]
+    nonterminals: tuple[NTS, ...]
+    lhs: tuple[int, ...]
+    rhs: tuple[tuple[int, ...], ...]
+    by_lhs: tuple[tuple[int, ...], ...]
+    start: int
+    stride: int
+    # symbol after the position of an item or None if the item is complete
+    next_symbol: tuple[Optional[int], ...]
+    # items with position 0 in the closure of an item that has the nonterminal next
+    nt_closure: tuple[frozenset[int], ...]
+
+    @property
+    def eof(self) -> int:
+        return len(self.terminals)
+
+    @property
+    def unknown(self) -> int:
+        return len(self.terminals) + 1
+
+    def item(self, production: int, position: int = 0) -> int:
+        return production * self.stride + position
+
+    def production(self, item: int) -> int:
+        return item // self.stride
+
+    def position(self, item: int) -> int:
+        return item % self.stride
+
+    def rule(self, production: int) -> Production[NTS, TS]:
+        return self.grammar.rules[production]
+
+    def symbol(self, sym: Symbol) -> int:
+        match sym:
+            case NT(nt):
+                return ~self.nonterminals.index(nt)
+            case ts:
+                return self.terminals.index(ts)
+
+    def closure(self, kernel: Iterable[int]) -> frozenset[int]:
+        closure = set(kernel)
+        for item in list(closure):
+            sym = self.next_symbol[item]
+            if sym is not None and sym < 0:
+                closure |= self.nt_closure[~sym]
+        return frozenset(closure)
+
+    def goto(self, state: frozenset[int], sym: int) -> frozenset[int]:
+        next_symbol = self.next_symbol
+        return self.closure(item + 1 for item in state if next_symbol[item] == sym)
+
+
+def terminals_of(g: Grammar[NTS, TS]) -> tuple[TS, ...]:
+    # terminals only used in rules are appended to the declared ones
+    terminals = list(g.terminals)
+    for rule in g.rules:
+        for sym in rule.rhs:
+            if not isinstance(sym, NT) and sym not in terminals:
+                terminals.append(sym)
+    return tuple(terminals)
+
+
+@lru_cache(maxsize=256)
+def index_grammar(g: Grammar[NTS, TS]) -> IndexedGrammar[NTS, TS]:
+    terminals = terminals_of(g)
+    terminal_ids: dict[TS, int] = {}
+    for i, t in enumerate(terminals):
+        terminal_ids.setdefault(t, i)
+    nonterminal_ids = {n: i for i, n in enumerate(g.nonterminals)}
+
+    def encode(sym: Symbol) -> int:
+        match sym:
+            case NT(nt):
+                return ~nonterminal_ids[nt]
+            case ts:
+                return terminal_ids[ts]
+
+    rhs = tuple(tuple(encode(sym) for sym in rule.rhs) for rule in g.rules)
+    lhs = tuple(nonterminal_ids[rule.lhs] for rule in g.rules)
+    by_lhs = tuple(
+        tuple(p for p in range(len(lhs)) if lhs[p] == n)
+        for n in range(len(g.nonterminals))
+    )
+    stride = max(map(len, rhs), default=0) + 1
+    next_symbol = tuple(
+        rhs[p][d] if d < len(rhs[p]) else None
+        for p in range(len(rhs))
+        for d in range(stride)
+    )
+
+    def nt_closure(n: int) -> frozenset[int]:
+        items: set[int] = set()
+        visited, worklist = {n}, [n]
+        while worklist:
+            for p in by_lhs[worklist.pop()]:
+                items.add(p * stride)
+                if rhs[p] and rhs[p][0] < 0 and ~rhs[p][0] not in visited:
+                    visited.add(~rhs[p][0])
+                    worklist.append(~rhs[p][0])
+        return frozenset(items)
+
+    return IndexedGrammar(
+        g,
+        terminals,
+        g.nonterminals,
+        lhs,
+        rhs,
+        by_lhs,
+        nonterminal_ids[g.start],
+        stride,
+        next_symbol,
+        tuple(nt_closure(n) for n in range(len(g.nonterminals))),
+    )
+
+
+def classifier(
+    ig: IndexedGrammar[NTS, TS], eq: Callable[[TS, TS], bool]
+) -> Callable[[TS], int]:
+    """maps input symbols to terminal ids (ig.unknown if no terminal matches)"""
+    unknown = ig.unknown
+    if eq is equality:
+        ids: dict[Any, int] = {}
+        for i, t in enumerate(ig.terminals):
+            ids.setdefault(t, i)
+        return lambda t: ids.get(t, unknown)
+    if eq is token_equality:
+        type_ids: dict[type, int] = {}
+        for i, t in enumerate(ig.terminals):
+            type_ids.setdefault(type(t), i)
+        return lambda t: type_ids.get(type(t), unknown)
+    if eq is kind_equality:
+        return kind_classifier(ig)
+    terminals = ig.terminals
+    return lambda t: next((i for i, u in enumerate(terminals) if eq(u, t)), unknown)
+
+
+def kind_classifier(ig: IndexedGrammar[NTS, TS]) -> Callable[[TS], int]:
+    """maps the kind of a token (see number_kinds in scanner.py) to the terminal id"""
+    size = 0
+    for t in ig.terminals:
+        if getattr(t, "kind", -1) < 0:
+            raise Exception(f"token class of {t!r} has no kind")
+        size = max(size, t.kind + 1)
+    # the extra entry is for tokens without kind (-1)
+    ids = [ig.unknown] * (size + 1)
+    for i, t in reversed(list(enumerate(ig.terminals))):
+        ids[t.kind] = i
+    unknown = ig.unknown
+    return lambda t: ids[t.kind] if t.kind < size else unknown
+
+
+### streaming input ###
+
+
+@dataclass
+class TokenStream(Generic[TS]):
+    """input symbols and their terminal ids read on demand from an iterator
+
+    Only the symbols of the requested lookahead are buffered, so scanning and
+    parsing proceed token by token.
+    """
+
+    tokens: Iterator[TS]
+    kind: Callable[[TS], int]
+    eof: int
+    buffer: deque[tuple[TS, int]] = field(default_factory=deque)
+
+    def fill(self, k: int) -> None:
+        while len(self.buffer) < k:
+            for token in self.tokens:
+                self.buffer.append((token, self.kind(token)))
+                break
+            else:
+                return
+
+    def first(self) -> int:
+        """terminal id of the next symbol (eof at the end of the input)"""
+        if not self.buffer:
+            self.fill(1)
+        return self.buffer[0][1] if self.buffer else self.eof
+
+    def peek(self, k: int) -> tuple[int, ...]:
+        """terminal ids of the next (at most) k symbols"""
+        self.fill(k)
+        return tuple(kind for _, kind in islice(self.buffer, k))
+
+    def advance(self) -> TS:
+        if not self.buffer:
+            self.fill(1)
+        return self.buffer.popleft()[0]
+
+    def at_end(self) -> bool:
+        return self.first() == self.eof
+
+
+def token_stream(
+    ig: IndexedGrammar[NTS, TS], inp: Iterable[TS], eq: Callable[[TS, TS], bool]
+) -> TokenStream[TS]:
+    return TokenStream(iter(inp), classifier(ig, eq), ig.eof)
+
+
+### lookaheads ###
+
+
+@dataclass
+class LookaheadIds:
+    """interns lookahead tuples of terminal ids as small ints"""
+
+    ids: dict[tuple[int, ...], int] = field(default_factory=dict)
+    tuples: list[tuple[int, ...]] = field(default_factory=list)
+
+    def __call__(self, lookahead: tuple[int, ...]) -> int:
+        i = self.ids.get(lookahead)
+        if i is None:
+            i = self.ids[lookahead] = len(self.tuples)
+            self.tuples.append(lookahead)
+        return i
+
+
+def encode_lookaheads(
+    ig: IndexedGrammar[NTS, TS], first_k: dict[NTS, Lookaheads]
+) -> tuple[frozenset[tuple[int, ...]], ...]:
+    """first_k of every nonterminal (by index) with terminals replaced by their ids"""
+    ids = {t: ig.terminals.index(t) for t in ig.terminals}
+    return tuple(
+        frozenset(tuple(ids[t] for t in la) for la in first_k[n])
+        for n in ig.nonterminals
+    )
+
+
+def first_k_ids(
+    k: int,
+    first_k: tuple[frozenset[tuple[int, ...]], ...],
+    alpha: Iterable[int],
+    lookahead: tuple[int, ...] = (),
+) -> frozenset[tuple[int, ...]]:
+    """first_k(alpha lookahead) for a sequence of symbol ids"""
+    result: frozenset[tuple[int, ...]] = frozenset([()])
+    for sym in alpha:
+        if all(len(la) >= k for la in result):
+            return result
+        if sym < 0:
+            result = frozenset(
+                (x + y)[:k] if len(x) < k else x for x in result for y in first_k[~sym]
+            )
+        else:
+            result = frozenset(x + (sym,) if len(x) < k else x for x in result)
+    return frozenset((x + lookahead)[:k] for x in result)
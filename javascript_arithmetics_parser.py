@@ -1,9 +1,13 @@
 import sys
 from grammar import *
-from typing import Any
+from typing import Any, Callable, Iterable, Optional
 from javascript_scanner import *
 from arithmetics_parser import AST, Var, Const, Ret, BinOp
-from lr_k_parser import parse_from_tokens as lr_k_parse_from_tokens
+from batch import parse_batch
+from indexed_grammar import kind_equality
+from lalr_tables import lalr_table
+from lr_k_parser import parse as lr_k_parse
+from lr_tables import LRTable, parse_ast
 
 ### full lexer and parser based on the javascript literals ###
 ### and simple arithmetic operations ###
@@ -39,14 +43,38 @@ grammar = Grammar[str, Token](
     "S",
 )
 
+# built once, so the analyses and tables cached for it are reused by every parse
+start_separated_grammar = start_separated(grammar, "S'")
+
 
 def lex_and_parse(inp: str) -> tuple[bool, Any]:
-    scan = list(make_scanner(js_token, inp))
-    start_separated_grammar = start_separated(grammar, "S'")
-    result = lr_k_parse_from_tokens(start_separated_grammar, 1, scan)
+    # tokens are scanned on demand while parsing
+    scan = make_scanner(js_token, inp)
+    # the tokens are classified by the kinds numbered in javascript_scanner.py
+    result = lr_k_parse(start_separated_grammar, 1, scan, kind_equality)
     return result
 
 
+def prepare(table: Optional[LRTable] = None) -> Callable[[str], tuple[bool, Any]]:
+    """parse function using the LALR(1) table of the grammar unless given"""
+    table = lalr_table(start_separated_grammar) if table is None else table
+
+    def parse(inp: str) -> tuple[bool, Any]:
+        scan = make_scanner(js_token, inp)
+        return parse_ast(start_separated_grammar, scan, kind_equality, table)
+
+    return parse
+
+
+def lex_and_parse_all(
+    inputs: Iterable[str], workers: Optional[int] = None
+) -> list[Any]:
+    """results of lex_and_parse in order, a batch.Failure for inputs that can
+    not be scanned, the table is computed once and shipped to the workers"""
+    table = lalr_table(start_separated_grammar)
+    return parse_batch(prepare, inputs, (table,), workers)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         arg = "return (xpos+ypos) / 2"
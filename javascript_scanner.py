@@ -39,6 +39,9 @@ class Strlit(Token):
     value: str
 
 
+number_kinds(Return, Intlit, Ident, Lparen, Rparen, BinaryOp, Strlit)
+
+
 binop = class_regexp("+*/")  # minus is excluded to avoid ambiguities
 digit = char_range_regexp("0", "9")
 hexdigit = alternative_list(
@@ -0,0 +1,159 @@
+from grammar import *
+from grammar_analysis import calculate_empty
+from grammar_cache import default_cache
+from indexed_grammar import *
+from lr_tables import *
+from profiling import Profile
+from scanner import Token
+from typing import Callable, Iterable, Optional
+
+
+### LALR(1) lookaheads by DeRemer and Pennello ###
+
+
+"""
+The lookaheads are computed for the nonterminal transitions (p, A) of the LR(0)
+automaton:
+
+DR(p, A)      terminals shifted in goto(p, A)
+(p, A) reads (r, C)       iff r = goto(p, A) and C is nullable
+(p, A) includes (p', B)   iff B -> beta A gamma, gamma is nullable and p' -beta-> p
+(q, A -> w) lookback (p, A)  iff p -w-> q
+
+Read = DR closed under reads, Follow = Read closed under includes and the
+lookahead of a reduction in q by A -> w is the union of Follow over lookback.
+"""
+
+
+INFINITY = 1 << 62
+
+
+def digraph(relation: list[list[int]], initial: list[set[int]]) -> list[set[int]]:
+    """smallest F with F(x) = initial(x) | union of F(y) for x relation y
+
+    Strongly connected components get the same set, the traversal is iterative so
+    large automata do not hit the recursion limit.
+    """
+    depth = [0] * len(relation)
+    result = [set(s) for s in initial]
+    stack: list[int] = []
+    for root in range(len(relation)):
+        if depth[root]:
+            continue
+        stack.append(root)
+        depth[root] = len(stack)
+        frames = [(root, iter(relation[root]), len(stack))]
+        while frames:
+            x, successors, d = frames[-1]
+            for y in successors:
+                if depth[y] == 0:
+                    stack.append(y)
+                    depth[y] = len(stack)
+                    frames.append((y, iter(relation[y]), len(stack)))
+                    break
+                depth[x] = min(depth[x], depth[y])
+                result[x] |= result[y]
+            else:
+                frames.pop()
+                if depth[x] == d:
+                    while True:
+                        top = stack.pop()
+                        depth[top] = INFINITY
+                        result[top] = result[x]
+                        if top == x:
+                            break
+                if frames:
+                    parent = frames[-1][0]
+                    depth[parent] = min(depth[parent], depth[x])
+                    result[parent] |= result[x]
+    return result
+
+
+def lalr_actions(
+    g: Grammar[NTS, TS],
+    ig: IndexedGrammar[NTS, TS],
+    automaton: LR0Automaton,
+    profile: Optional[Profile] = None,
+) -> Actions:
+    transitions = automaton.transitions
+    empty = calculate_empty(g)
+    nullable = [empty[n] for n in ig.nonterminals]
+    start_production = ig.by_lhs[ig.start][0]
+
+    # number the nonterminal transitions
+    nt_transitions = [
+        (p, ~sym) for p, edges in enumerate(transitions) for sym in edges if sym < 0
+    ]
+    index = {transition: i for i, transition in enumerate(nt_transitions)}
+
+    direct_reads: list[set[int]] = []
+    reads: list[list[int]] = []
+    for p, a in nt_transitions:
+        r = transitions[p][~a]
+        dr = {sym for sym in transitions[r] if sym >= 0}
+        if ig.item(start_production, 1) in automaton.states[r]:
+            dr.add(ig.eof)
+        direct_reads.append(dr)
+        reads.append(
+            [index[(r, ~sym)] for sym in transitions[r] if sym < 0 and nullable[~sym]]
+        )
+
+    includes: list[list[int]] = [[] for _ in nt_transitions]
+    lookback: dict[tuple[int, int], list[int]] = {}
+    for i, (p, b) in enumerate(nt_transitions):
+        for production in ig.by_lhs[b]:
+            rhs = ig.rhs[production]
+            state = p
+            for position, sym in enumerate(rhs):
+                rest = rhs[position + 1 :]
+                if sym < 0 and all(s < 0 and nullable[~s] for s in rest):
+                    includes[index[(state, ~sym)]].append(i)
+                state = transitions[state][sym]
+            lookback.setdefault((state, production), []).append(i)
+
+    with_reads = digraph(reads, direct_reads)
+    follow = digraph(includes, with_reads)
+    if profile is not None:
+        profile.count("LALR(1) nonterminal transitions", len(nt_transitions))
+        profile.count("LALR(1) reads", sum(map(len, reads)))
+        profile.count("LALR(1) includes", sum(map(len, includes)))
+
+    actions = shift_actions(ig, automaton)
+    for state, items in enumerate(automaton.states):
+        for item in items:
+            if ig.next_symbol[item] is not None:
+                continue
+            production = ig.production(item)
+            lookaheads: set[int] = set()
+            if production == start_production:
+                lookaheads.add(ig.eof)
+            for i in lookback.get((state, production), []):
+                lookaheads |= follow[i]
+            for terminal in sorted(lookaheads):
+                add_reduce(actions, state, terminal, production)
+    return actions
+
+
+def build_lalr_table(g: Grammar[NTS, TS], profile: Optional[Profile] = None) -> LRTable:
+    ig = index_grammar(g)
+    automaton = lr_0_automaton(ig, profile)
+    if profile is None:
+        actions = lalr_actions(g, ig, automaton)
+    else:
+        with profile.phase("LALR(1) lookaheads"):
+            actions = lalr_actions(g, ig, automaton, profile)
+    return resolve(ig, automaton, actions, "LALR(1)", profile)
+
+
+def lalr_table(g: Grammar[NTS, TS]) -> LRTable:
+    return default_cache.lookup("lalr_table", g, 1, lambda: build_lalr_table(g))
+
+
+# convenience
+def parse_from_string(g: Grammar[NTS, str], inp: str) -> bool:
+    return parse(g, inp, equality, lalr_table(g))
+
+
+# convenience
+def parse_from_tokens(g: Grammar[NTS, Token], inp: Iterable[Token]) -> bool:
+    return parse(g, inp, token_equality, lalr_table(g))
@@ -1,73 +1,215 @@
 from grammar import *
 from grammar_analysis import *
+from grammar_cache import default_cache
+from indexed_grammar import *
+from profiling import Profile
 from scanner import Token
+from dataclasses import dataclass
 from functools import partial
-from typing import Optional
+from typing import Iterable, Optional
 
 
-### LL(k) parser ###
-
-
-def equality(x: TS, y: TS) -> bool:
-    return x == y
+### LL(k) parse table ###
 
 
-def token_equality(x: Token, y: Token) -> bool:
-    return type(x) == type(y)
+@dataclass(frozen=True)
+class LLTable:
+    k: int
+    # (nonterminal index, ids of the next (at most) k terminals) -> production
+    table: dict[tuple[int, tuple[int, ...]], int]
+    # (nonterminal index, lookahead, all productions with that lookahead)
+    conflicts: tuple[tuple[int, tuple[int, ...], tuple[int, ...]], ...]
 
 
-def parse(
-    g: Grammar[NTS, TS], k: int, inp: list[TS], eq: Callable[[TS, TS], bool] = equality
-) -> bool:
+def build_ll_table(
+    g: Grammar[NTS, TS], k: int, profile: Optional[Profile] = None
+) -> LLTable:
+    ig = index_grammar(g)
     fika = FirstKAnalysis[NTS, TS](k)
-    first_k_nt = fika.run(g)  # first_k for NT's
+    first_k_nt = fika.run(g, profile)  # first_k for NT's
     first_k = partial(fika.rhs_analysis, first_k_nt)  # complete first_k function
-    foka = FollowKAnalysis[NTS, TS](k, first_k_nt)
-    follow_k = foka.run(g)
+    follow_k = FollowKAnalysis[NTS, TS](k, first_k_nt).run(g, profile)
+    terminal_ids = {t: ig.terminals.index(t) for t in ig.terminals}
 
     def lookahead(rule: Production) -> Lookaheads:
         return fika.concat(first_k(rule.rhs), follow_k[rule.lhs])
 
-    def accept_symbol(sym: Symbol, inp: list[TS]) -> Optional[list[TS]]:
-        match sym:
-            case NT(nt):
-                prefix = tuple(inp[:k])
-                candidates = []
-                # check if prefix matches one of the lookaheads of a rule
-                for rule in g.productions_with_lhs(nt):
-                    for la in lookahead(rule):
-                        if len(la) == len(prefix):
-                            if all(eq(l, p) for l, p in zip(la, prefix)):
-                                candidates.append(rule)
-                                break
-                if len(candidates) > 1:
-                    print("Grammar is not LL(" + str(k) + ")")
-                if len(candidates) > 0:
-                    return accept_list(list(candidates[0].rhs), inp)
-            case t:
-                if len(inp) > 0 and eq(t, inp[0]):
-                    return inp[1:]
-        return None
-
-    def accept_list(alpha: list[Symbol], inp: list[TS]) -> Optional[list[TS]]:
-        for sym in alpha:
-            new_inp = accept_symbol(sym, inp)
-            if new_inp is None:
-                return None
-            inp = new_inp
-        return inp
-
-    result = accept_symbol(NT(g.start), inp)
+    candidates: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+    for production, rule in enumerate(g.rules):
+        for la in lookahead(rule):
+            key = (ig.lhs[production], tuple(terminal_ids[t] for t in la))
+            candidates.setdefault(key, []).append(production)
+    conflicts = tuple(
+        (nt, la, tuple(productions))
+        for (nt, la), productions in candidates.items()
+        if len(productions) > 1
+    )
+    if profile is not None:
+        profile.count("LL(" + str(k) + ") table entries", len(candidates))
+        for nt, la, productions in conflicts:
+            profile.conflict(
+                f"LL({k}) conflict for {g.nonterminals[nt]} on {la}: {productions}"
+            )
+    # like in a conflict free table the first production in rule order is used
+    return LLTable(
+        k, {key: productions[0] for key, productions in candidates.items()}, conflicts
+    )
+
+
+def ll_table(g: Grammar[NTS, TS], k: int) -> LLTable:
+    return default_cache.lookup("ll_table", g, k, lambda: build_ll_table(g, k))
+
+
+### LL(k) parser ###
+
+
+def predict(
+    ig: IndexedGrammar[NTS, TS],
+    table: LLTable,
+    tokens: TokenStream[TS],
+    shift: Optional[Callable[[TS], None]] = None,
+    reduce: Optional[Callable[[int], None]] = None,
+) -> bool:
+    """predictive parser with an explicit stack of expected symbols
+
+    shift is called with every accepted input symbol and reduce with every
+    production after its right-hand side is accepted (i.e. in postfix order), so
+    both together suffice to construct a parse tree.
+    """
+    k, lookup = table.k, table.table
+    rhs_reversed = [rhs[::-1] for rhs in ig.rhs]
+    # stack entries >= marker stand for the reduction of production entry - marker
+    marker = ig.unknown + 1
+    stack = [~ig.start]
+    while stack:
+        sym = stack.pop()
+        if sym < 0:
+            # a single lookup selects the production for the next k symbols
+            production = lookup.get((~sym, tokens.peek(k)))
+            if production is None:
+                return False
+            if reduce is not None:
+                stack.append(marker + production)
+            stack.extend(rhs_reversed[production])
+        elif sym >= marker:
+            cast(Callable[[int], None], reduce)(sym - marker)
+        elif tokens.first() == sym:
+            token = tokens.advance()
+            if shift is not None:
+                shift(token)
+        else:
+            return False
     # The parser can not be used for prefix acceptance because of cases where the length
     # of a lookahead of a rule is strictly less than the rest of the input and k.
-    return result is not None and len(result) == 0
+    return tokens.at_end()
+
+
+def prepare(
+    g: Grammar[NTS, TS], k: int, inp: Iterable[TS], eq: Callable[[TS, TS], bool]
+) -> tuple[IndexedGrammar[NTS, TS], LLTable, TokenStream[TS]]:
+    ig = index_grammar(g)
+    # conflicts are reported when the table is built (LLTable.conflicts)
+    return ig, ll_table(g, k), token_stream(ig, inp, eq)
+
+
+def parse(
+    g: Grammar[NTS, TS],
+    k: int,
+    inp: Iterable[TS],
+    eq: Callable[[TS, TS], bool] = equality,
+) -> bool:
+    return predict(*prepare(g, k, inp, eq))
+
+
+def parse_ast(
+    g: Grammar[NTS, TS],
+    k: int,
+    inp: Iterable[TS],
+    eq: Callable[[TS, TS], bool] = equality,
+) -> tuple[bool, Any]:
+    """like lr_k_parser.parse the constructs of the rules (ext) are computed"""
+    return LLParser(g, k, eq).parse(inp)
+
+
+def parse_postfix(
+    g: Grammar[NTS, TS],
+    k: int,
+    inp: Iterable[TS],
+    eq: Callable[[TS, TS], bool] = equality,
+) -> tuple[bool, list[Union[TS, Production[NTS, TS]]]]:
+    """returns the input symbols interleaved with the applied rules in postfix order"""
+    events: list[Union[TS, Production[NTS, TS]]] = []
+    result = predict(
+        *prepare(g, k, inp, eq),
+        events.append,
+        lambda production: events.append(g.rules[production]),
+    )
+    return result, events if result else []
+
+
+### reusable parser objects ###
+
+
+class LLParser(Generic[NTS, TS]):
+    """LL(k) parser prepared once, the table is immutable and every call keeps
+    its stacks to itself, so one instance can serve many threads (or asyncio
+    tasks) at once"""
+
+    def __init__(
+        self, g: Grammar[NTS, TS], k: int, eq: Callable[[TS, TS], bool] = equality
+    ) -> None:
+        self.grammar = g
+        self.k = k
+        self.ig = index_grammar(g)
+        self.table = ll_table(g, k)
+        self.classify = classifier(self.ig, eq)
+
+    def tokens(self, inp: Iterable[TS]) -> TokenStream[TS]:
+        return TokenStream(iter(inp), self.classify, self.ig.eof)
+
+    def recognize(self, inp: Iterable[TS]) -> bool:
+        return predict(self.ig, self.table, self.tokens(inp))
+
+    def parse(self, inp: Iterable[TS]) -> tuple[bool, Any]:
+        """like parse_ast the constructs of the rules (ext) are computed"""
+        rules = self.grammar.rules
+        # used to store sub parts of the current parse structure (e.g. an AST)
+        constructs: list[Any] = []
+
+        def reduce(production: int) -> None:
+            rule = rules[production]
+            arity = len(rule.rhs)
+            args = constructs[len(constructs) - arity :]
+            del constructs[len(constructs) - arity :]
+            # default construct is None if rule.ext is None
+            constructs.append(None if rule.ext is None else rule.ext(*args))
+
+        result = predict(
+            self.ig, self.table, self.tokens(inp), constructs.append, reduce
+        )
+        return result, constructs[0] if result else None
+
+    def __call__(self, inp: Iterable[TS]) -> tuple[bool, Any]:
+        return self.parse(inp)
 
 
 # convenience
 def parse_from_string(g: Grammar[NTS, str], k: int, inp: str) -> bool:
-    return parse(g, k, list(inp), equality)
+    return parse(g, k, inp, equality)
 
 
 # convenience
-def parse_from_tokens(g: Grammar[NTS, Token], k: int, inp: list[Token]) -> bool:
+def parse_from_tokens(g: Grammar[NTS, Token], k: int, inp: Iterable[Token]) -> bool:
     return parse(g, k, inp, token_equality)
+
+
+# convenience
+def parse_ast_from_string(g: Grammar[NTS, str], k: int, inp: str) -> tuple[bool, Any]:
+    return parse_ast(g, k, inp, equality)
+
+
+# convenience
+def parse_ast_from_tokens(
+    g: Grammar[NTS, Token], k: int, inp: Iterable[Token]
+) -> tuple[bool, Any]:
+    return parse_ast(g, k, inp, token_equality)
@@ -1,135 +1,95 @@
 from grammar import *
 from dataclasses import dataclass
-from ll_k_parser import equality, token_equality
-from typing import cast
+from indexed_grammar import *
+from typing import Iterable
 from scanner import Token
 
 
-### items for recursive-ascent-parsers ###
+### items ###
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Item(Generic[NTS, TS]):
+    """readable form of an encoded LR(0) item (e.g. in conflict descriptions)"""
+
     rule: Production[NTS, TS]
     position: int
-    lookahead: tuple[TS, ...] = ()
-
-    def lhs(self) -> NTS:
-        return self.rule.lhs
-
-    def rhs(self) -> list[Symbol]:
-        return list(self.rule.rhs)
-
-    def rhs_start(self) -> list[Symbol]:
-        return list(self.rule.rhs[: self.position])
 
-    def rhs_rest(self) -> list[Symbol]:
-        return list(self.rule.rhs[self.position :])
-
-
-def can_shift(item, symbol: Symbol, eq: Callable[[TS, TS], bool] = equality) -> bool:
-    if item.position >= len(item.rule.rhs):
-        return False
-    rhs_symbol = item.rule.rhs[item.position]
-    match (rhs_symbol, symbol):
-        case (NT(nt1), NT(nt2)):
-            return nt1 == nt2
-        case (NT(nt), ts) | (ts, NT(nt)):
-            return False
-        case (ts1, ts2):
-            return eq(ts1, cast(TS, ts2))
-    raise Exception(f"Unexpected case: {(rhs_symbol, symbol)}")
 
-
-def shift_item(item: Item) -> Item:
-    return Item(item.rule, item.position + 1, item.lookahead)
+### stack based LR(0) parser ###
 
 
-### stack based LR(0) parser ###
+# LR(0) items are encoded as ints (see indexed_grammar.py)
+State = frozenset[int]
 
 
-State = frozenset[Item[NTS, TS]]
+def decode_item(ig: IndexedGrammar[NTS, TS], item: int) -> Item[NTS, TS]:
+    return Item(ig.rule(ig.production(item)), ig.position(item))
 
 
-def compute_closure(g: Grammar[NTS, TS], state: State) -> State:
-    closure: set[Item[NTS, TS]] = set()
-    new_closure = set(state)
-    while closure != new_closure:
-        closure = new_closure.copy()
-        for item in closure:
-            match item.rhs_rest():
-                case [NT(nt), *rest]:
-                    for rule in g.productions_with_lhs(nt):
-                        new_closure.add(Item(rule, 0))
-    return frozenset(new_closure)
+def compute_closure(ig: IndexedGrammar[NTS, TS], state: State) -> State:
+    return ig.closure(state)
 
 
-def goto(
-    g: Grammar[NTS, TS], state: State, symbol: Symbol, eq: Callable[[TS, TS], bool]
-) -> State:
-    return compute_closure(
-        g,
-        frozenset([shift_item(item) for item in state if can_shift(item, symbol, eq)]),
-    )
+def goto(ig: IndexedGrammar[NTS, TS], state: State, symbol: int) -> State:
+    return ig.goto(state, symbol)
 
 
-def initial_state(g: Grammar[NTS, TS]) -> State:
-    rules = g.productions_with_lhs(g.start)
+def initial_state(ig: IndexedGrammar[NTS, TS]) -> State:
+    rules = ig.by_lhs[ig.start]
     if len(rules) != 1:
         raise Exception("Grammar is not start-separated! (use function in grammar.py)")
-    return compute_closure(g, frozenset([Item(rules[0], 0)]))
+    return compute_closure(ig, frozenset([ig.item(rules[0])]))
 
 
-def reducable_items(state: State) -> list[Item[NTS, TS]]:
-    items = []
-    for item in state:
-        if len(item.rhs_rest()) == 0:
-            items.append(item)
-    return items
+def reducable_items(ig: IndexedGrammar[NTS, TS], state: State) -> list[int]:
+    return [item for item in state if ig.next_symbol[item] is None]
 
 
-def is_final(g: Grammar[NTS, TS], state: State) -> bool:
-    for item in state:
-        if g.start == item.lhs() and len(item.rhs_rest()) == 0:
+def is_final(ig: IndexedGrammar[NTS, TS], state: State) -> bool:
+    for item in reducable_items(ig, state):
+        if ig.lhs[ig.production(item)] == ig.start:
             return True
     return False
 
 
 def parse(
-    g: Grammar[NTS, TS], inp: list[TS], eq: Callable[[TS, TS], bool] = equality
+    g: Grammar[NTS, TS], inp: Iterable[TS], eq: Callable[[TS, TS], bool] = equality
 ) -> bool:
-    def rec_parse(stack: list[State], inp: list[TS]) -> bool:
+    ig = index_grammar(g)
+    tokens = token_stream(ig, inp, eq)
+    stack = [initial_state(ig)]
+    while True:
         state = stack[-1]
         # We accept if len(stack) == 2 because the initial item S' -> .S will be
         # completed after exactly one shift i.e. adding one additional state to the stack.
-        if is_final(g, state) and len(stack) == 2 and len(inp) == 0:
+        if is_final(ig, state) and len(stack) == 2 and tokens.at_end():
             return True
 
-        shiftable = []
-        if len(inp) > 0:
-            shiftable = [item for item in state if can_shift(item, inp[0], eq)]
-        reducable: list[Item[NTS, TS]] = reducable_items(state)
-        if len(reducable) + (shiftable != []) > 1:
+        kind = tokens.first()
+        shiftable = kind != ig.eof and any(
+            ig.next_symbol[item] == kind for item in state
+        )
+        reducable = reducable_items(ig, state)
+        if len(reducable) + shiftable > 1:
             print("Grammar is not LR(0)")
-        if len(shiftable) > 0:
-            return shift(shiftable[0].rhs_rest()[0], stack, inp[1:])
-        if len(reducable) > 0:
-            new_stack = stack[: len(stack) - len(reducable[0].rhs_start())]
-            return shift(NT(reducable[0].lhs()), new_stack, inp)
-        return False
-
-    def shift(symbol: Symbol, stack: list[State], inp: list[TS]) -> bool:
-        state = stack[-1]
-        return rec_parse(stack + [goto(g, state, symbol, equality)], inp)
-
-    return rec_parse([initial_state(g)], inp)
+        if shiftable:
+            stack.append(goto(ig, state, kind))
+            tokens.advance()
+        elif len(reducable) > 0:
+            production = ig.production(reducable[0])
+            if ig.rhs[production]:
+                del stack[-len(ig.rhs[production]) :]
+            stack.append(goto(ig, stack[-1], ~ig.lhs[production]))
+        else:
+            return False
 
 
 # convenience
 def parse_from_string(g: Grammar[NTS, str], inp: str) -> bool:
-    return parse(g, list(inp), equality)
+    return parse(g, inp, equality)
 
 
 # convenience
-def parse_from_tokens(g: Grammar[NTS, Token], inp: list[Token]) -> bool:
+def parse_from_tokens(g: Grammar[NTS, Token], inp: Iterable[Token]) -> bool:
     return parse(g, inp, token_equality)
@@ -0,0 +1,167 @@
+from grammar import *
+from grammar_cache import default_cache, first_k_analysis
+from indexed_grammar import *
+from lr_tables import *
+from profiling import Profile
+from scanner import Token
+from typing import Callable, Iterable, Optional
+
+
+### LR(1) automaton with Pager's weak compatibility merging ###
+
+
+"""
+An LR(1) kernel maps LR(0) items to their set of lookahead terminal ids. Kernels
+with the same LR(0) core are merged if they are weakly compatible (Pager 1977),
+i.e. merging can not introduce a reduce/reduce conflict that is not already
+present in one of them. For LALR(1) grammars this yields the LALR(1) automaton,
+for other LR(1) grammars states are only split where necessary.
+"""
+
+
+Kernel = dict[int, frozenset[int]]
+
+
+def lr_1_closure(
+    ig: IndexedGrammar[NTS, TS],
+    first_1: tuple[frozenset[tuple[int, ...]], ...],
+    kernel: Kernel,
+) -> dict[int, set[int]]:
+    items = {item: set(lookaheads) for item, lookaheads in kernel.items()}
+    worklist = list(items)
+    while worklist:
+        item = worklist.pop()
+        sym = ig.next_symbol[item]
+        if sym is None or sym >= 0:
+            continue
+        rest = ig.rhs[ig.production(item)][ig.position(item) + 1 :]
+        new: set[int] = set()
+        for la in items[item]:
+            new.update(t[0] for t in first_k_ids(1, first_1, rest, (la,)))
+        for production in ig.by_lhs[~sym]:
+            target = items.setdefault(ig.item(production), set())
+            if not new <= target:
+                target |= new
+                worklist.append(ig.item(production))
+    return items
+
+
+def weakly_compatible(a: Kernel, b: Kernel) -> bool:
+    """merging a and b (same core) can not create a new conflict (Pager)"""
+    items = sorted(a)
+    for i, x in enumerate(items):
+        for y in items[i + 1 :]:
+            if (a[x] & b[y]) or (a[y] & b[x]):
+                if not (a[x] & a[y]) and not (b[x] & b[y]):
+                    return False
+    return True
+
+
+def lr_1_automaton(
+    g: Grammar[NTS, TS],
+    ig: IndexedGrammar[NTS, TS],
+    profile: Optional[Profile] = None,
+) -> tuple[LR0Automaton, list[dict[int, set[int]]]]:
+    """returns the automaton with LR(0) item sets and the lookaheads of every item"""
+    rules = ig.by_lhs[ig.start]
+    if len(rules) != 1:
+        raise Exception("Grammar is not start-separated! (use function in grammar.py)")
+    first_1 = encode_lookaheads(ig, first_k_analysis(g, 1))
+
+    kernels: list[Kernel] = [{ig.item(rules[0]): frozenset([ig.eof])}]
+    cores: dict[frozenset[int], list[int]] = {frozenset(kernels[0]): [0]}
+    transitions: list[dict[int, int]] = [{}]
+    worklist = [0]
+    merges = 0
+    while worklist:
+        state = worklist.pop()
+        items = lr_1_closure(ig, first_1, kernels[state])
+        successors: dict[int, dict[int, set[int]]] = {}
+        for item, lookaheads in items.items():
+            sym = ig.next_symbol[item]
+            if sym is not None:
+                successors.setdefault(sym, {}).setdefault(item + 1, set()).update(
+                    lookaheads
+                )
+        for sym in sorted(successors):
+            kernel = {item: frozenset(las) for item, las in successors[sym].items()}
+            core = frozenset(kernel)
+            for target in cores.get(core, []):
+                if weakly_compatible(kernels[target], kernel):
+                    merged = {
+                        item: kernels[target][item] | kernel[item] for item in kernel
+                    }
+                    if merged != kernels[target]:
+                        kernels[target] = merged
+                        merges += 1
+                        if target not in worklist:
+                            worklist.append(target)
+                    break
+            else:
+                target = len(kernels)
+                kernels.append(kernel)
+                cores.setdefault(core, []).append(target)
+                transitions.append({})
+                worklist.append(target)
+            transitions[state][sym] = target
+
+    # states can become unreachable when their predecessor grew and moved on
+    numbering = {0: 0}
+    order = [0]
+    for state in order:
+        for target in transitions[state].values():
+            if target not in numbering:
+                numbering[target] = len(order)
+                order.append(target)
+    lookaheads = [lr_1_closure(ig, first_1, kernels[state]) for state in order]
+    automaton = LR0Automaton(
+        tuple(frozenset(items) for items in lookaheads),
+        tuple(
+            {sym: numbering[t] for sym, t in sorted(transitions[state].items())}
+            for state in order
+        ),
+    )
+    if profile is not None:
+        profile.count("LR(1) item sets", len(order))
+        profile.count("LR(1) merges", merges)
+    return automaton, lookaheads
+
+
+def lr_1_actions(
+    ig: IndexedGrammar[NTS, TS],
+    automaton: LR0Automaton,
+    lookaheads: list[dict[int, set[int]]],
+) -> Actions:
+    actions = shift_actions(ig, automaton)
+    for state, items in enumerate(lookaheads):
+        for item in sorted(items):
+            if ig.next_symbol[item] is None:
+                for terminal in sorted(items[item]):
+                    add_reduce(actions, state, terminal, ig.production(item))
+    return actions
+
+
+def build_lr_1_table(g: Grammar[NTS, TS], profile: Optional[Profile] = None) -> LRTable:
+    ig = index_grammar(g)
+    if profile is None:
+        automaton, lookaheads = lr_1_automaton(g, ig)
+    else:
+        with profile.phase("LR(1) item sets"):
+            automaton, lookaheads = lr_1_automaton(g, ig, profile)
+    return resolve(
+        ig, automaton, lr_1_actions(ig, automaton, lookaheads), "LR(1)", profile
+    )
+
+
+def lr_1_table(g: Grammar[NTS, TS]) -> LRTable:
+    return default_cache.lookup("lr_1_table", g, 1, lambda: build_lr_1_table(g))
+
+
+# convenience
+def parse_from_string(g: Grammar[NTS, str], inp: str) -> bool:
+    return parse(g, inp, equality, lr_1_table(g))
+
+
+# convenience
+def parse_from_tokens(g: Grammar[NTS, Token], inp: Iterable[Token]) -> bool:
+    return parse(g, inp, token_equality, lr_1_table(g))
@@ -1,150 +1,276 @@
+import threading
 from grammar import *
 from grammar_analysis import *
-from dataclasses import dataclass
-from functools import partial
-from typing import Callable, cast
-from ll_k_parser import equality, token_equality
-from lr_0_parser import is_final, State, Item, shift_item, can_shift, equality
+from grammar_cache import default_cache, first_k_analysis
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional, Sequence, cast
+from indexed_grammar import *
+from lr_0_parser import State
+from lr_1_tables import lr_1_table
+from lr_tables import LRTable, evaluate as evaluate_table
 from scanner import Token
 
 
-### continuation based LR(k) parser ###
+### LR(k) parser ###
+
+
+"""
+An LR(k) item is encoded as the int `lookahead * len(ig.next_symbol) + item`, where
+item is the LR(0) item (see indexed_grammar.py) and lookahead the id of the
+lookahead tuple of terminal ids in a LookaheadIds table.
+"""
+
+
+FirstK = tuple[frozenset[tuple[int, ...]], ...]
 
 
 def compute_closure(
-    g: Grammar[NTS, TS],
+    ig: IndexedGrammar[NTS, TS],
     k: int,
-    first_k: Callable[[list[Symbol]], Lookaheads],
+    first_k: FirstK,
+    lookaheads: LookaheadIds,
     state: State,
 ) -> State:
-    closure: set[Item[NTS, TS]] = set()
-    new_closure = set(state)
-    while closure != new_closure:
-        closure = new_closure.copy()
-        for item in closure:
-            match item.rhs_rest():
-                case [NT(nt), *rest]:
-                    for lookahead in first_k(rest + list(item.lookahead)):
-                        for rule in g.productions_with_lhs(nt):
-                            new_closure.add(Item(rule, 0, lookahead))
-    return frozenset(new_closure)
-
-
-def goto(
-    g: Grammar[NTS, TS],
-    k: int,
-    first_k: Callable[[list[Symbol]], Lookaheads],
-    state: State,
-    symbol: Symbol,
-    eq: Callable[[TS, TS], bool],
-) -> State:
-    return compute_closure(
-        g,
-        k,
-        first_k,
-        frozenset([shift_item(item) for item in state if can_shift(item, symbol, eq)]),
-    )
+    n = len(ig.next_symbol)
+    closure = set(state)
+    worklist = list(state)
+    while worklist:
+        la, item = divmod(worklist.pop(), n)
+        sym = ig.next_symbol[item]
+        if sym is not None and sym < 0:
+            rest = ig.rhs[ig.production(item)][ig.position(item) + 1 :]
+            for lookahead in first_k_ids(k, first_k, rest, lookaheads.tuples[la]):
+                offset = lookaheads(lookahead) * n
+                for production in ig.by_lhs[~sym]:
+                    new_item = offset + ig.item(production)
+                    if new_item not in closure:
+                        closure.add(new_item)
+                        worklist.append(new_item)
+    return frozenset(closure)
 
 
 def initial_state(
-    g: Grammar[NTS, TS], k: int, first_k: Callable[[list[Symbol]], Lookaheads]
+    ig: IndexedGrammar[NTS, TS], k: int, first_k: FirstK, lookaheads: LookaheadIds
 ) -> State:
-    rules = g.productions_with_lhs(g.start)
+    rules = ig.by_lhs[ig.start]
     if len(rules) != 1:
         raise Exception("Grammar is not start-separated! (use function in grammar.py)")
+    offset = lookaheads(()) * len(ig.next_symbol)
     return compute_closure(
-        g,
-        k,
-        first_k,
-        frozenset([Item(rule, 0, ()) for rule in g.productions_with_lhs(g.start)]),
+        ig, k, first_k, lookaheads, frozenset([offset + ig.item(rules[0])])
     )
 
 
-def reducable_items(
-    state: State, prefix: tuple[TS, ...], eq: Callable[[TS, TS], bool]
-) -> list[Item[NTS, TS]]:
-    items = []
+def is_final(ig: IndexedGrammar[NTS, TS], state: State) -> bool:
+    n = len(ig.next_symbol)
     for item in state:
-        if len(item.rhs_rest()) == 0 and len(item.lookahead) == len(prefix):
-            if all(eq(l, p) for l, p in zip(item.lookahead, prefix)):
-                items.append(item)
-    return items
+        if (
+            ig.next_symbol[item % n] is None
+            and ig.lhs[ig.production(item % n)] == ig.start
+        ):
+            return True
+    return False
+
+
+### lazily explored LR(k) automaton ###
+
+
+@dataclass(frozen=True)
+class LRkState:
+    items: State
+    # terminal ids that can be shifted
+    shifts: frozenset[int]
+    # lookahead id -> productions of the complete items with that lookahead
+    reductions: dict[int, list[int]]
+    final: bool
+
+
+@dataclass
+class LRkAutomaton(Generic[NTS, TS]):
+    """LR(k) states interned as ints with goto edges computed on first use
+
+    The automaton only depends on the fingerprint of the grammar, hence it is shared
+    by all parses with the same grammar and k. New states are added under a lock,
+    so parses may run concurrently in several threads.
+    """
+
+    ig: IndexedGrammar[NTS, TS]
+    k: int
+    first_k: FirstK
+    lookaheads: LookaheadIds = field(default_factory=LookaheadIds)
+    states: list[LRkState] = field(default_factory=list)
+    transitions: list[dict[int, int]] = field(default_factory=list)
+    # states are identified by their kernels, closures are computed once per state
+    kernels: dict[State, int] = field(default_factory=dict)
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        items = initial_state(self.ig, self.k, self.first_k, self.lookaheads)
+        start_item = self.lookaheads(()) * len(self.ig.next_symbol) + self.ig.item(
+            self.ig.by_lhs[self.ig.start][0]
+        )
+        self.add_state(items, frozenset([start_item]))
+
+    def add_state(self, items: State, kernel: State) -> int:
+        ig, n = self.ig, len(self.ig.next_symbol)
+        reductions: dict[int, list[int]] = {}
+        for item in sorted(items):
+            if ig.next_symbol[item % n] is None:
+                reductions.setdefault(item // n, []).append(ig.production(item % n))
+        shifts = {ig.next_symbol[item % n] for item in items}
+        self.states.append(
+            LRkState(
+                items,
+                frozenset(cast(int, s) for s in shifts if s is not None and s >= 0),
+                reductions,
+                is_final(ig, items),
+            )
+        )
+        self.transitions.append({})
+        self.kernels[kernel] = len(self.states) - 1
+        return len(self.states) - 1
+
+    def goto(self, state: int, symbol: int) -> int:
+        target = self.transitions[state].get(symbol)
+        if target is None:
+            with self.lock:
+                target = self.explore(state, symbol)
+        return target
+
+    def explore(self, state: int, symbol: int) -> int:
+        # the edge may have been added by another thread in the meantime
+        target = self.transitions[state].get(symbol)
+        if target is None:
+            n, next_symbol = len(self.ig.next_symbol), self.ig.next_symbol
+            items = self.states[state].items
+            kernel = frozenset(i + 1 for i in items if next_symbol[i % n] == symbol)
+            target = self.kernels.get(kernel)
+            if target is None:
+                closure = compute_closure(
+                    self.ig, self.k, self.first_k, self.lookaheads, kernel
+                )
+                target = self.add_state(closure, kernel)
+            self.transitions[state][symbol] = target
+        return target
+
 
+def lr_k_automaton(g: Grammar[NTS, TS], k: int) -> LRkAutomaton[NTS, TS]:
+    return default_cache.lookup(
+        "lr_k_automaton",
+        g,
+        k,
+        lambda: LRkAutomaton(
+            index_grammar(g),
+            k,
+            encode_lookaheads(index_grammar(g), first_k_analysis(g, k)),
+        ),
+        persistent=False,
+    )
+
+
+def evaluate(
+    automaton: LRkAutomaton[NTS, TS],
+    rules: Sequence[Production[NTS, TS]],
+    tokens: TokenStream[TS],
+) -> tuple[bool, Any]:
+    """parses tokens and applies the ext of the rules, all state of the parse is local"""
+    ig, k = automaton.ig, automaton.k
+    # LR(k) states and the parse structures (e.g. an AST) of the symbols between them
+    states = [0]
+    values: list[Any] = []
+    while True:
+        info = automaton.states[states[-1]]
+        if info.final and tokens.at_end():
+            return True, values[-1]
 
-def nactive(state: State) -> int:
-    return max(map(lambda item: len(item.rhs_start()), state), default=0)
+        kind = tokens.first()
+        shiftable = kind in info.shifts
+        prefix = automaton.lookaheads.ids.get(tokens.peek(k))
+        reducable = info.reductions.get(cast(int, prefix), [])
+        if len(reducable) + shiftable > 1:
+            print("Grammar is not LR(" + str(k) + ")")
+        if shiftable:
+            values.append(tokens.advance())
+            states.append(automaton.goto(states[-1], kind))
+        elif len(reducable) > 0:
+            rule = rules[reducable[0]]
+            arity = len(rule.rhs)
+            args = values[len(values) - arity :]
+            if arity:
+                del values[-arity:]
+                del states[-arity:]
+            # default construct is None if rule.ext is None
+            values.append(None if rule.ext is None else rule.ext(*args))
+            states.append(automaton.goto(states[-1], ~ig.lhs[reducable[0]]))
+        else:
+            return False, None
 
 
 def parse(
     g: Grammar[NTS, TS],
     k: int,
-    inp: list[TS],
+    inp: Iterable[TS],
     # TS equality function (e.g. tokens need type equality other than strings)
     eq: Callable[[TS, TS], bool] = equality,
 ) -> tuple[bool, Any]:
-    fika = FirstKAnalysis[NTS, TS](k)
-    first_k_nt = fika.run(g)
-    first_k = partial(fika.rhs_analysis, first_k_nt)
-    # used to store sub parts of the current parse structure (e.g. an AST)
-    constructs: list[Any] = []
-
-    def rec_parse(
-        state: State,  # we recursively assume that state is a closure
-        continuations: list[Callable[[Symbol, list[TS]], bool]],
-        inp: list[TS],
-    ) -> bool:
-        nonlocal constructs
-
-        if is_final(g, state) and len(inp) == 0:
-            return True
+    automaton = lr_k_automaton(g, k)
+    return evaluate(automaton, g.rules, token_stream(automaton.ig, inp, eq))
 
-        def c0(
-            symbol: Symbol,
-            inp: list[TS],
-        ) -> bool:
-            next_state = goto(g, k, first_k, state, symbol, eq)
-            return rec_parse(
-                next_state, [c0] + continuations[: nactive(next_state) - 1], inp
-            )
 
-        shiftable = []
-        if len(inp) > 0:
-            shiftable = [item for item in state if can_shift(item, inp[0], eq)]
-        reducable = cast(
-            list[Item[NTS, TS]], reducable_items(state, tuple(inp[:k]), eq)
-        )
-        if len(reducable) + (shiftable != []) > 1:
-            print("Grammar is not LR(" + str(k) + ")")
-        if len(shiftable) > 0:
-            # constructing the parse structure
-            constructs = [inp[0]] + constructs
-            # calling the continuation
-            return c0(inp[0], inp[1:])
-        if len(reducable) > 0:
-            rule = reducable[0].rule
-            # constructing the parse structure
-            arity = len(rule.rhs)
-            construct = (
-                None  # default construct is None if rule.ext is None
-                if rule.ext is None
-                else rule.ext(*constructs[:arity][::-1])
-            )
-            constructs = [construct] + constructs[arity:]
-            # calling the continuation
-            return ([c0] + continuations)[len(rule.rhs)](NT(rule.lhs), inp)
-        return False
+### reusable parser objects ###
+
+
+class LRParser(Generic[NTS, TS]):
+    """LR(k) parser for a start-separated grammar, prepared once and shared
+
+    For k = 1 the LR(1) table of lr_1_tables.py (or the given table) is used,
+    otherwise the lazily explored LR(k) automaton. The automaton does not resolve
+    conflicts by precedence, so grammars declaring precedence levels are
+    rejected for k != 1 (unless a table is given). Tables are immutable and the
+    automaton is extended under a lock, every call keeps its stacks to itself,
+    so one instance can serve many threads (or asyncio tasks) at once.
+    """
+
+    def __init__(
+        self,
+        g: Grammar[NTS, TS],
+        k: int = 1,
+        eq: Callable[[TS, TS], bool] = equality,
+        table: Optional[LRTable] = None,
+    ) -> None:
+        self.grammar = g
+        self.k = k
+        self.ig = index_grammar(g)
+        self.classify = classifier(self.ig, eq)
+        self.table: Optional[LRTable] = None
+        self.automaton: Optional[LRkAutomaton[NTS, TS]] = None
+        if table is None and k != 1:
+            if g.precedence:
+                raise Exception(f"precedence declarations require k = 1, not {k}")
+            self.automaton = lr_k_automaton(g, k)
+            return
+        self.table = lr_1_table(g) if table is None else table
+
+    def parse(self, inp: Iterable[TS]) -> tuple[bool, Any]:
+        """returns whether inp is accepted and the construct of the start symbol"""
+        tokens = TokenStream(iter(inp), self.classify, self.ig.eof)
+        if self.table is not None:
+            return evaluate_table(self.ig, self.table, tokens, self.grammar.rules)
+        return evaluate(cast(LRkAutomaton, self.automaton), self.grammar.rules, tokens)
 
-    result = rec_parse(initial_state(g, k, first_k), [], inp)
-    return result, constructs[0] if result else None
+    def __call__(self, inp: Iterable[TS]) -> tuple[bool, Any]:
+        return self.parse(inp)
 
 
 # convenience
 def parse_from_string(g: Grammar[NTS, str], k: int, inp: str) -> tuple[bool, Any]:
-    return parse(g, k, list(inp), equality)
+    return parse(g, k, inp, equality)
 
 
 # convenience
 def parse_from_tokens(
-    g: Grammar[NTS, Token], k: int, inp: list[Token]
+    g: Grammar[NTS, Token], k: int, inp: Iterable[Token]
 ) -> tuple[bool, Any]:
     return parse(g, k, inp, token_equality)
@@ -0,0 +1,374 @@
+from grammar import *
+from grammar_analysis import *
+from grammar_cache import default_cache
+from dataclasses import dataclass
+from indexed_grammar import *
+from lr_0_parser import State, initial_state, decode_item
+from profiling import Profile
+from scanner import Token
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+
+### canonical LR(0) collection ###
+
+
+@dataclass(frozen=True)
+class LR0Automaton:
+    # closed item sets, state 0 is the initial state
+    states: tuple[State, ...]
+    # state -> symbol id -> successor state
+    transitions: tuple[dict[int, int], ...]
+
+
+def lr_0_automaton(
+    ig: IndexedGrammar[NTS, TS], profile: Optional[Profile] = None
+) -> LR0Automaton:
+    start = initial_state(ig)
+    states = [start]
+    transitions: list[dict[int, int]] = []
+    # states are identified by their kernels, closures are computed once per state
+    kernels = {start: 0}
+    for state in states:
+        edges: dict[int, list[int]] = {}
+        for item in state:
+            sym = ig.next_symbol[item]
+            if sym is not None:
+                edges.setdefault(sym, []).append(item + 1)
+        successors: dict[int, int] = {}
+        for sym in sorted(edges):
+            kernel = frozenset(edges[sym])
+            if kernel not in kernels:
+                kernels[kernel] = len(states)
+                states.append(ig.closure(kernel))
+            successors[sym] = kernels[kernel]
+        transitions.append(successors)
+    if profile is not None:
+        profile.count("LR(0) item sets", len(states))
+        profile.count("LR(0) items", sum(map(len, states)))
+    return LR0Automaton(tuple(states), tuple(transitions))
+
+
+### LR parse tables ###
+
+
+"""
+Actions are encoded as ints: shift to state s is 2 * s, reduce by production p
+is 2 * p + 1 and ERROR is -1. Reducing the start production accepts.
+"""
+
+ERROR = -1
+
+Actions = list[dict[int, list[int]]]
+
+
+def shift_action(state: int) -> int:
+    return state << 1
+
+
+def reduce_action(production: int) -> int:
+    return (production << 1) | 1
+
+
+@dataclass(frozen=True)
+class Conflict:
+    state: int
+    terminal: int
+    actions: tuple[int, ...]
+    chosen: int
+
+
+@dataclass(frozen=True)
+class LRTable:
+    name: str
+    # state -> terminal id (including eof and unknown) -> action
+    action: tuple[tuple[int, ...], ...]
+    # state -> nonterminal index -> state (or ERROR)
+    goto: tuple[tuple[int, ...], ...]
+    start_production: int
+    conflicts: tuple[Conflict, ...]
+    # (state, terminal) made errors by nonassociative operators, such states must
+    # not reduce by default (see table_compression.py)
+    nonassoc: tuple[tuple[int, int], ...] = ()
+
+
+def shift_actions(ig: IndexedGrammar[NTS, TS], automaton: LR0Automaton) -> Actions:
+    return [
+        {sym: [shift_action(target)] for sym, target in transitions.items() if sym >= 0}
+        for transitions in automaton.transitions
+    ]
+
+
+def add_reduce(actions: Actions, state: int, terminal: int, production: int) -> None:
+    cell = actions[state].setdefault(terminal, [])
+    if reduce_action(production) not in cell:
+        cell.append(reduce_action(production))
+
+
+def describe(ig: IndexedGrammar[NTS, TS], action: int) -> str:
+    if action & 1:
+        return f"reduce {decode_item(ig, ig.item(action >> 1))}"
+    return f"shift {action >> 1}"
+
+
+### precedence ###
+
+
+"""
+As in yacc, the precedence levels of g.precedence decide shift/reduce conflicts
+between a terminal and a production that both have a precedence: the higher
+level wins and on the same level left associativity reduces, right
+associativity shifts and nonassociative operators are an error. A production
+has the precedence of its prec terminal or else of the last terminal of its rhs
+that has one. Conflicts decided this way are not reported.
+"""
+
+
+def precedence_ids(
+    ig: IndexedGrammar[NTS, TS],
+) -> tuple[dict[int, tuple[int, str]], list[Optional[int]]]:
+    """levels (from 1) and associativities of terminal ids and levels of productions"""
+    levels: dict[Any, tuple[int, str]] = {}
+    for level, p in enumerate(ig.grammar.precedence, 1):
+        if p.associativity not in ("left", "right", "nonassoc"):
+            raise Exception(f"unknown associativity {p.associativity!r}")
+        for t in p.terminals:
+            levels[t] = (level, p.associativity)
+    terminals = {
+        i: levels[t] for i, t in enumerate(ig.terminals) if t in levels and i < ig.eof
+    }
+    productions: list[Optional[int]] = []
+    for production, rule in enumerate(ig.grammar.rules):
+        if rule.prec is not None:
+            if rule.prec not in levels:
+                raise Exception(f"no precedence declared for {rule.prec!r}")
+            productions.append(levels[rule.prec][0])
+            continue
+        last = [terminals[sym] for sym in ig.rhs[production] if sym in terminals]
+        productions.append(last[-1][0] if last else None)
+    return terminals, productions
+
+
+def decide(
+    terminal: Optional[tuple[int, str]], production: Optional[int]
+) -> Optional[str]:
+    """ "shift", "reduce", "error" or None if precedence does not decide"""
+    if terminal is None or production is None:
+        return None
+    level, associativity = terminal
+    if production != level:
+        return "reduce" if production > level else "shift"
+    return {"left": "reduce", "right": "shift"}.get(associativity, "error")
+
+
+def resolve(
+    ig: IndexedGrammar[NTS, TS],
+    automaton: LR0Automaton,
+    actions: Actions,
+    name: str,
+    profile: Optional[Profile] = None,
+) -> LRTable:
+    """builds dense tables, conflicts are resolved by the declared precedence, else
+    in favor of shifting and otherwise of the production that comes first in the
+    grammar"""
+    terminal_levels, production_levels = precedence_ids(ig)
+    width = ig.unknown + 1
+    action_rows: list[tuple[int, ...]] = []
+    conflicts: list[Conflict] = []
+    nonassoc: list[tuple[int, int]] = []
+    decided = 0
+    for state, cells in enumerate(actions):
+        row = [ERROR] * width
+        for terminal, candidates in cells.items():
+            row[terminal] = min(candidates, key=lambda a: (a & 1, a))
+            if len(candidates) == 1:
+                continue
+            reductions = sorted(a for a in candidates if a & 1)
+            shifts = [a for a in candidates if not a & 1]
+            decision = None
+            if shifts and reductions:
+                decision = decide(
+                    terminal_levels.get(terminal), production_levels[reductions[0] >> 1]
+                )
+            if decision == "reduce":
+                row[terminal] = reductions[0]
+            elif decision == "error":
+                row[terminal] = ERROR
+                nonassoc.append((state, terminal))
+            if decision is not None:
+                decided += 1
+            # remaining reduce/reduce conflicts are still reported
+            if decision is None or len(reductions) > 1:
+                conflicts.append(
+                    Conflict(state, terminal, tuple(candidates), row[terminal])
+                )
+        action_rows.append(tuple(row))
+    goto_rows = tuple(
+        tuple(transitions.get(~n, ERROR) for n in range(len(ig.nonterminals)))
+        for transitions in automaton.transitions
+    )
+    if profile is not None:
+        profile.count(name + " states", len(action_rows))
+        profile.count(name + " actions", sum(len(cells) for cells in actions))
+        if decided:
+            profile.count(name + " precedence decisions", decided)
+        for c in conflicts:
+            terminal = "eof" if c.terminal == ig.eof else repr(ig.terminals[c.terminal])
+            profile.conflict(
+                f"{name} conflict in state {c.state} on {terminal}: "
+                + ", ".join(describe(ig, a) for a in c.actions)
+            )
+    return LRTable(
+        name,
+        tuple(action_rows),
+        goto_rows,
+        ig.by_lhs[ig.start][0],
+        tuple(conflicts),
+        tuple(nonassoc),
+    )
+
+
+### SLR(1) ###
+
+
+def slr_actions(
+    ig: IndexedGrammar[NTS, TS],
+    automaton: LR0Automaton,
+    follow: dict[NTS, Lookaheads],
+) -> Actions:
+    actions = shift_actions(ig, automaton)
+    terminal_ids = {t: ig.terminals.index(t) for t in ig.terminals}
+    follow_ids = [
+        {terminal_ids[la[0]] if la else ig.eof for la in follow[n]}
+        for n in ig.nonterminals
+    ]
+    for state, items in enumerate(automaton.states):
+        for item in items:
+            if ig.next_symbol[item] is None:
+                production = ig.production(item)
+                for terminal in sorted(follow_ids[ig.lhs[production]]):
+                    add_reduce(actions, state, terminal, production)
+    return actions
+
+
+def build_slr_table(g: Grammar[NTS, TS], profile: Optional[Profile] = None) -> LRTable:
+    ig = index_grammar(g)
+    first_1 = FirstKAnalysis[NTS, TS](1).run(g, profile)
+    follow_1 = FollowKAnalysis[NTS, TS](1, first_1).run(g, profile)
+    automaton = lr_0_automaton(ig, profile)
+    return resolve(
+        ig, automaton, slr_actions(ig, automaton, follow_1), "SLR(1)", profile
+    )
+
+
+def slr_table(g: Grammar[NTS, TS]) -> LRTable:
+    return default_cache.lookup("slr_table", g, 1, lambda: build_slr_table(g))
+
+
+### table driven LR parser ###
+
+
+def drive(ig: IndexedGrammar[NTS, TS], table: LRTable, kinds: Iterable[int]) -> bool:
+    """kinds are consumed one at a time, e.g. from a lazy map over a scanner"""
+    action, goto = table.action, table.goto
+    lengths = [len(rhs) for rhs in ig.rhs]
+    lhs = ig.lhs
+    kinds = iter(kinds)
+    kind = next(kinds, ig.eof)
+    stack = [0]
+    while True:
+        a = action[stack[-1]][kind]
+        if a == ERROR:
+            return False
+        if a & 1 == 0:
+            stack.append(a >> 1)
+            kind = next(kinds, ig.eof)
+            continue
+        production = a >> 1
+        if production == table.start_production:
+            return True
+        if lengths[production]:
+            del stack[-lengths[production] :]
+        stack.append(goto[stack[-1]][lhs[production]])
+
+
+def evaluate(
+    ig: IndexedGrammar[NTS, TS],
+    table: LRTable,
+    tokens: TokenStream[TS],
+    rules: Sequence[Production[NTS, TS]],
+) -> tuple[bool, Any]:
+    """like drive but with a value stack, reductions apply the ext of the rule"""
+    action, goto = table.action, table.goto
+    lengths = [len(rhs) for rhs in ig.rhs]
+    exts = [rule.ext for rule in rules]
+    lhs = ig.lhs
+    stack = [0]
+    values: list[Any] = []
+    while True:
+        a = action[stack[-1]][tokens.first()]
+        if a == ERROR:
+            return False, None
+        if a & 1 == 0:
+            stack.append(a >> 1)
+            values.append(tokens.advance())
+            continue
+        production = a >> 1
+        if production == table.start_production:
+            return True, values[-1]
+        n = lengths[production]
+        ext = exts[production]
+        if n:
+            args = values[-n:]
+            del values[-n:]
+            del stack[-n:]
+            # default construct is None if rule.ext is None
+            values.append(None if ext is None else ext(*args))
+        else:
+            values.append(None if ext is None else ext())
+        stack.append(goto[stack[-1]][lhs[production]])
+
+
+def parse(
+    g: Grammar[NTS, TS],
+    inp: Iterable[TS],
+    eq: Callable[[TS, TS], bool] = equality,
+    table: Optional[LRTable] = None,
+) -> bool:
+    """parses inp with the SLR(1) table of g unless another table is given"""
+    ig = index_grammar(g)
+    table = slr_table(g) if table is None else table
+    return drive(ig, table, map(classifier(ig, eq), inp))
+
+
+def parse_ast(
+    g: Grammar[NTS, TS],
+    inp: Iterable[TS],
+    eq: Callable[[TS, TS], bool] = equality,
+    table: Optional[LRTable] = None,
+) -> tuple[bool, Any]:
+    """parses inp and constructs the parse structure from the ext of the rules"""
+    ig = index_grammar(g)
+    table = slr_table(g) if table is None else table
+    return evaluate(ig, table, token_stream(ig, inp, eq), g.rules)
+
+
+# convenience
+def parse_from_string(g: Grammar[NTS, str], inp: str) -> bool:
+    return parse(g, inp, equality)
+
+
+# convenience
+def parse_from_tokens(g: Grammar[NTS, Token], inp: Iterable[Token]) -> bool:
+    return parse(g, inp, token_equality)
+
+
+# convenience
+def parse_ast_from_string(g: Grammar[NTS, str], inp: str) -> tuple[bool, Any]:
+    return parse_ast(g, inp, equality)
+
+
+# convenience
+def parse_ast_from_tokens(
+    g: Grammar[NTS, Token], inp: Iterable[Token]
+) -> tuple[bool, Any]:
+    return parse_ast(g, inp, token_equality)
@@ -0,0 +1,194 @@
+import sys
+import ast
+import importlib
+from grammar import *
+from grammar_transform import fresh_nonterminal
+from indexed_grammar import *
+from lalr_tables import lalr_table
+from lr_tables import LRTable
+from table_compression import PackedTable, compress
+from typing import Callable, Optional
+
+
+### generation of standalone LR parser modules ###
+
+
+"""
+The generated module contains the packed tables of table_compression.py and a
+driver specialized to them. It only imports array and the ext functions and
+token classes of the grammar, so importing it does not analyse the grammar.
+Ext functions must be importable by name (module level functions), lambdas can
+not be referenced from generated code. Their modules are imported under the
+aliases _m0, _m1, ..., so equal names from different modules (or names of the
+generated module like parse) do not replace each other.
+"""
+
+
+def reference(obj: Any, imports: dict[str, str]) -> str:
+    """name of obj in the generated module, its module is added to imports
+    (module -> alias)"""
+    module = getattr(obj, "__module__", None)
+    name = getattr(obj, "__qualname__", "")
+    if module is None or "<" in name:
+        raise Exception(f"{obj!r} can not be referenced by name")
+    found: Any = importlib.import_module(module)
+    for part in name.split("."):
+        found = getattr(found, part, None)
+    if found is not obj:
+        raise Exception(f"{obj!r} is not importable as {module}.{name}")
+    alias = imports.setdefault(module, f"_m{len(imports)}")
+    return f"{alias}.{name}"
+
+
+def literal(obj: Any) -> str:
+    if ast.literal_eval(repr(obj)) != obj:
+        raise Exception(f"{obj!r} has no literal representation")
+    return repr(obj)
+
+
+def array_source(values: Any) -> str:
+    return f'array("i", {list(values)!r})'
+
+
+DRIVER = '''
+
+def parse(inp: Iterable[Any]) -> tuple[bool, Any]:
+    """parses the input symbols and constructs the value of the start symbol"""
+    tokens = iter(inp)
+    token: Any = next(tokens, None)
+    kind = EOF if token is None else KINDS.get(KEY(token), UNKNOWN)
+    stack = [0]
+    values: list[Any] = []
+    while True:
+        state = stack[-1]
+        i = ACTION_BASE[state] + kind
+        if 0 <= i < len(ACTION_CHECK) and ACTION_CHECK[i] == state:
+            a = ACTION_NEXT[i]
+        else:
+            a = DEFAULT_ACTION[state]
+        if a == -1:
+            return False, None
+        if a & 1 == 0:
+            stack.append(a >> 1)
+            values.append(token)
+            token = next(tokens, None)
+            kind = EOF if token is None else KINDS.get(KEY(token), UNKNOWN)
+            continue
+        production = a >> 1
+        if production == START_PRODUCTION:
+            return True, values[-1]
+        n, ext = LENGTHS[production], EXTS[production]
+        if n:
+            args = values[-n:]
+            del values[-n:]
+            del stack[-n:]
+            values.append(None if ext is None else ext(*args))
+        else:
+            values.append(None if ext is None else ext())
+        nt = LHS[production]
+        i = GOTO_BASE[nt] + stack[-1]
+        if 0 <= i < len(GOTO_CHECK) and GOTO_CHECK[i] == nt:
+            stack.append(GOTO_NEXT[i])
+        else:
+            stack.append(DEFAULT_GOTO[nt])
+'''
+
+
+def generate(
+    g: Grammar[NTS, TS],
+    eq: Callable[[TS, TS], bool] = equality,
+    table: Optional[LRTable] = None,
+) -> str:
+    """source of a module with a function parse(inp) -> tuple[bool, Any]
+
+    Terminals are classified by equality (they must be literals), by their type
+    for token_equality or by their kind for kind_equality. The LALR(1) table of
+    g is used unless another table is given.
+    """
+    ig = index_grammar(g)
+    table = lalr_table(g) if table is None else table
+    packed: PackedTable = compress(table)
+    imports: dict[str, str] = {}
+
+    if eq is equality:
+        key = "lambda t: t"
+        kinds = [literal(t) for t in ig.terminals]
+    elif eq is token_equality:
+        key = "type"
+        kinds = [reference(type(t), imports) for t in ig.terminals]
+    elif eq is kind_equality:
+        key = "lambda t: t.kind"
+        kinds = [literal(t.kind) for t in ig.terminals]
+    else:
+        raise Exception(
+            "only equality, token_equality and kind_equality can be generated"
+        )
+    exts = []
+    for rule in g.rules:
+        if rule.ext is None:
+            exts.append("None")
+        elif getattr(rule.ext, "__name__", "") == "<lambda>":
+            raise Exception(f"ext of {rule.lhs} -> {rule.rhs} is a lambda")
+        else:
+            exts.append(reference(rule.ext, imports))
+
+    kind_entries = {}
+    for i, kind in enumerate(kinds):
+        kind_entries.setdefault(kind, i)
+    lines = [
+        "# generated by parser_codegen.py, do not edit",
+        "from array import array",
+        "from typing import Any, Iterable",
+        *(f"import {module} as {alias}" for module, alias in imports.items()),
+        "",
+        "",
+        "KINDS: dict[Any, int] = {"
+        + ", ".join(f"{kind}: {i}" for kind, i in kind_entries.items())
+        + "}",
+        f"KEY = {key}",
+        f"EOF = {ig.eof}",
+        f"UNKNOWN = {ig.unknown}",
+        f"START_PRODUCTION = {packed.start_production}",
+        f"LENGTHS = {tuple(len(rhs) for rhs in ig.rhs)!r}",
+        f"LHS = {ig.lhs!r}",
+        "EXTS = (" + "".join(ext + ", " for ext in exts) + ")",
+    ]
+    for field in [
+        "default_action",
+        "action_base",
+        "action_next",
+        "action_check",
+        "default_goto",
+        "goto_base",
+        "goto_next",
+        "goto_check",
+    ]:
+        lines.append(f"{field.upper()} = {array_source(getattr(packed, field))}")
+    return "\n".join(lines) + "\n" + DRIVER
+
+
+def write_module(
+    g: Grammar[NTS, TS],
+    path: str,
+    eq: Callable[[TS, TS], bool] = equality,
+    table: Optional[LRTable] = None,
+) -> None:
+    with open(path, "w") as f:
+        f.write(generate(g, eq, table))
+
+
+if __name__ == "__main__":
+    # e.g. python parser_codegen.py my_grammars.expr_grammar expr_parser.py
+    # (add "tokens" or "kinds" to classify the input by token_equality or
+    # kind_equality)
+    if len(sys.argv) < 3:
+        print("usage: parser_codegen.py module.grammar output.py [tokens|kinds]")
+        sys.exit(1)
+    module, attribute = sys.argv[1].rsplit(".", 1)
+    g = getattr(importlib.import_module(module), attribute)
+    if len(g.productions_with_lhs(g.start)) != 1:
+        g = start_separated(g, fresh_nonterminal(g.nonterminals, g.start))
+    eq = {"tokens": token_equality, "kinds": kind_equality}.get(
+        (sys.argv[3:] or [""])[0], equality
+    )
+    write_module(g, sys.argv[2], eq)
@@ -0,0 +1,54 @@
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Iterator, TypeVar
+
+
+### profiling of grammar analyses and parser generators ###
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class Profile:
+    # seconds spent per phase
+    phases: dict[str, float] = field(default_factory=dict)
+    # iterations until the fixed point of an analysis is reached
+    iterations: dict[str, int] = field(default_factory=dict)
+    # size of the analysis result per nonterminal
+    set_sizes: dict[str, dict[str, int]] = field(default_factory=dict)
+    # e.g. number of item sets or table entries
+    counters: dict[str, int] = field(default_factory=dict)
+    conflicts: list[str] = field(default_factory=list)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def counting(self, name: str, update: Callable[[T], T]) -> Callable[[T], T]:
+        """wraps the update function of a fixed point iteration to count iterations"""
+
+        def counted(x: T) -> T:
+            self.iterations[name] = self.iterations.get(name, 0) + 1
+            return update(x)
+
+        return counted
+
+    def record_sizes(self, name: str, result: dict[Any, Any]) -> None:
+        self.set_sizes[name] = {str(key): len(value) for key, value in result.items()}
+
+    def conflict(self, description: str) -> None:
+        self.conflicts.append(description)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2)
@@ -0,0 +1,132 @@
+from grammar import *
+from indexed_grammar import *
+from lalr_tables import lalr_table
+from lr_tables import ERROR, LRTable
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Optional
+
+
+### push parser (the caller feeds the input) ###
+
+
+"""
+The LR driver of lr_tables.py turned inside out: instead of pulling tokens from
+an iterator, the parser is fed one token at a time and keeps its stacks between
+calls. Feeding a token performs the reductions it triggers and shifts it, so
+parsing proceeds while the input arrives (e.g. from a network stream).
+
+The values of the nonterminals in emit are returned as soon as they are reduced,
+e.g. the messages of a grammar Messages -> Messages Message | epsilon. The ext
+of the enclosing rule decides whether they are kept (e.g. by returning None).
+States whose only action is a reduction reduce without waiting for the next
+token, so a message ending with a terminator is emitted when it is fed.
+"""
+
+
+class ParseError(Exception):
+    pass
+
+
+class PushParser(Generic[NTS, TS]):
+    def __init__(
+        self,
+        g: Grammar[NTS, TS],
+        eq: Callable[[TS, TS], bool] = equality,
+        table: Optional[LRTable] = None,
+        emit: Iterable[NTS] = (),
+    ) -> None:
+        """g has to be start-separated, its LALR(1) table is used unless another
+        table is given"""
+        self.grammar = g
+        self.ig = index_grammar(g)
+        self.table = lalr_table(g) if table is None else table
+        self.classify = classifier(self.ig, eq)
+        self.emit = frozenset(self.ig.nonterminals.index(n) for n in emit)
+        self.lengths = tuple(len(rhs) for rhs in self.ig.rhs)
+        # a reduction without lookahead would hide the errors of nonassociative
+        # operators (see table_compression.py)
+        exact = {state for state, _ in self.table.nonassoc}
+        self.eager = tuple(
+            ERROR if state in exact else self.only_reduction(row)
+            for state, row in enumerate(self.table.action)
+        )
+        self.reset()
+
+    def only_reduction(self, row: tuple[int, ...]) -> int:
+        """the production if it is the only action of a state else ERROR"""
+        actions = set(row) - {ERROR}
+        if len(actions) != 1:
+            return ERROR
+        a = actions.pop()
+        if a & 1 == 0 or a >> 1 == self.table.start_production:
+            return ERROR
+        return a >> 1
+
+    def reset(self) -> None:
+        """starts a new input"""
+        self.states = [0]
+        self.values: list[Any] = []
+        self.finished = False
+
+    def apply(self, production: int, emitted: list[Any]) -> None:
+        states, values = self.states, self.values
+        n, ext = self.lengths[production], self.grammar.rules[production].ext
+        args = values[len(values) - n :]
+        if n:
+            del values[-n:]
+            del states[-n:]
+        # default construct is None if rule.ext is None
+        value = None if ext is None else ext(*args)
+        values.append(value)
+        nt = self.ig.lhs[production]
+        states.append(self.table.goto[states[-1]][nt])
+        if nt in self.emit:
+            emitted.append(value)
+
+    def reduce(self, kind: int, token: Optional[TS]) -> list[Any]:
+        """reductions on lookahead kind until it can be shifted or the input is
+        accepted, returns the emitted values"""
+        if self.finished:
+            raise ParseError("input has already ended or was rejected")
+        action, states = self.table.action, self.states
+        emitted: list[Any] = []
+        while True:
+            a = action[states[-1]][kind]
+            if a == ERROR:
+                self.finished = True
+                if token is None:
+                    raise ParseError("unexpected end of input")
+                raise ParseError(f"unexpected {token!r}")
+            if a & 1 == 0:
+                return emitted
+            if a >> 1 == self.table.start_production:
+                self.finished = True
+                return emitted
+            self.apply(a >> 1, emitted)
+
+    def feed(self, token: TS) -> list[Any]:
+        """processes the next input symbol, returns the values emitted meanwhile"""
+        kind = self.classify(token)
+        emitted = self.reduce(kind, token)
+        self.states.append(self.table.action[self.states[-1]][kind] >> 1)
+        self.values.append(token)
+        while self.eager[self.states[-1]] != ERROR:
+            self.apply(self.eager[self.states[-1]], emitted)
+        return emitted
+
+    def feed_eof(self) -> list[Any]:
+        """ends the input, returns the values emitted meanwhile followed by the
+        value of the whole input"""
+        emitted = self.reduce(self.ig.eof, None)
+        return emitted + [self.values[-1]]
+
+
+async def parse_async(
+    parser: PushParser[NTS, TS], tokens: AsyncIterable[TS]
+) -> AsyncIterator[Any]:
+    """yields the emitted values while the tokens arrive and the value of the
+    whole input at the end"""
+    async for token in tokens:
+        for value in parser.feed(token):
+            yield value
+    for value in parser.feed_eof():
+        yield value
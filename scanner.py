@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Callable, Iterator
+from typing import AsyncIterable, AsyncIterator, Callable, ClassVar, Iterator
 from regexp import *
 
 
@@ -40,7 +40,18 @@ A lex_action
 
 @dataclass(frozen=True)
 class Token:
-    pass
+    # small int identifying the token class, assigned by number_kinds
+    kind: ClassVar[int] = -1
+
+
+def number_kinds(*classes: type[Token]) -> None:
+    """assigns the kinds 0, 1, ... to the token classes of a scanner
+
+    Parsers classify tokens with kind_equality (see indexed_grammar.py) by
+    indexing a list with the kind instead of comparing or hashing tokens.
+    """
+    for kind, cls in enumerate(classes):
+        cls.kind = kind
 
 
 Position = int
@@ -119,3 +130,48 @@ def make_scanner(
     while i < len(ss):
         (token, i) = scan_one(ss, i)
         yield token
+
+
+class ReadBuffer(str):
+    """input of async_scanner, remembers the last position read by indexing
+
+    Scanners read the input symbol by symbol, and so do the scans started by
+    lex actions (e.g. to skip white space), as long as they are passed ss.
+    """
+
+    last_read: Position = -1
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            self.last_read = max(self.last_read, key % len(self))
+        return super().__getitem__(key)
+
+
+async def async_scanner(
+    scan_one: Callable[[str, Position], LexResult], chunks: AsyncIterable[str]
+) -> AsyncIterator[Token]:
+    """like make_scanner for input arriving in chunks (e.g. from a network stream)
+
+    A token is yielded as soon as the input that follows it can not change it
+    anymore, i.e. if its scan did not read up to the end of the available input.
+    Otherwise the rest of the input is kept until the next chunk arrives.
+    """
+    rest = ""
+    async for chunk in chunks:
+        ss = ReadBuffer(rest + chunk)
+        i = 0
+        while i < len(ss):
+            ss.last_read = -1
+            try:
+                token, j = scan_one(ss, i)
+            except ScanError:
+                if ss.last_read < len(ss) - 1:
+                    raise
+                break
+            if ss.last_read == len(ss) - 1:
+                break
+            yield token
+            i = j
+        rest = ss[i:]
+    for token in make_scanner(scan_one, rest):
+        yield token
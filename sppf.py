@@ -0,0 +1,264 @@
+from grammar import *
+from dataclasses import dataclass, field
+from indexed_grammar import *
+from typing import Callable, Iterator, Optional, Sequence, Union, cast
+
+
+### shared packed parse forests ###
+
+
+"""
+A node stands for all derivations of a symbol (or of a prefix of a right-hand
+side) from the input between start and end. Its families are the alternative
+derivations. Right-hand sides are binarized: a family of production p for a
+node that derives the first `position` symbols of the rhs consists of the node
+for the first position - 1 symbols (None if position is 1) and the node of the
+symbol at position - 1. Thus the forest has at most cubic size even for highly
+ambiguous grammars.
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolNode:
+    # terminal id or ~nonterminal index (see indexed_grammar.py)
+    symbol: int
+    start: int
+    end: int
+
+
+@dataclass(frozen=True, slots=True)
+class IntermediateNode:
+    # LR(0) item, i.e. the production and the length of the derived rhs prefix
+    item: int
+    start: int
+    end: int
+
+
+Node = Union[SymbolNode, IntermediateNode]
+
+
+@dataclass(frozen=True, slots=True)
+class Family:
+    production: int
+    left: Optional[Node]
+    right: Optional[Node]
+
+
+@dataclass
+class SPPF(Generic[NTS, TS]):
+    ig: IndexedGrammar[NTS, TS]
+    # the input symbols, terminal leaves refer to them by their start
+    tokens: list[TS]
+    root: SymbolNode
+    families: dict[Node, list[Family]] = field(default_factory=dict)
+
+    def is_terminal(self, node: Node) -> bool:
+        return isinstance(node, SymbolNode) and node.symbol >= 0
+
+    def is_ambiguous(self) -> bool:
+        return any(len(families) > 1 for families in self.families.values())
+
+    def label(self, node: Node) -> str:
+        if isinstance(node, IntermediateNode):
+            production = self.ig.production(node.item)
+            position = self.ig.position(node.item)
+            rhs = [self.symbol_name(sym) for sym in self.ig.rhs[production]]
+            symbols = " ".join(rhs[:position] + ["."] + rhs[position:])
+            name = f"{self.ig.nonterminals[self.ig.lhs[production]]} -> {symbols}"
+        else:
+            name = self.symbol_name(node.symbol)
+        return f"({name}, {node.start}, {node.end})"
+
+    def symbol_name(self, symbol: int) -> str:
+        if symbol < 0:
+            return str(self.ig.nonterminals[~symbol])
+        return repr(self.ig.terminals[symbol])
+
+
+### disambiguation filters ###
+
+
+"""
+A filter selects the families of a node that are kept, e.g. to prefer some
+productions or an associativity. Filters are applied in order to every node.
+"""
+
+
+Filter = Callable[[SPPF, Node, list[Family]], list[Family]]
+
+
+def choices(
+    forest: SPPF[NTS, TS], node: Node, filters: Sequence[Filter] = ()
+) -> list[Family]:
+    families = forest.families.get(node, [])
+    for f in filters:
+        if len(families) <= 1:
+            break
+        families = f(forest, node, families)
+    return families
+
+
+def priority(ranks: dict[int, int]) -> Filter:
+    """keeps the families whose production (by number) has the lowest rank
+
+    e.g. ranking + before * at the top of an expression lets * bind stronger.
+    Productions without rank have rank 0.
+    """
+
+    def keep(forest: SPPF, node: Node, families: list[Family]) -> list[Family]:
+        best = min(ranks.get(f.production, 0) for f in families)
+        return [f for f in families if ranks.get(f.production, 0) == best]
+
+    return keep
+
+
+def left_associative(forest: SPPF, node: Node, families: list[Family]) -> list[Family]:
+    """keeps the families whose last child is shortest, i.e. (a - b) - c"""
+    last = max(f.right.start for f in families if f.right is not None)
+    return [f for f in families if f.right is None or f.right.start == last]
+
+
+def right_associative(forest: SPPF, node: Node, families: list[Family]) -> list[Family]:
+    """keeps the families whose last child is longest, i.e. a ^ (b ^ c)"""
+    first = min(f.right.start for f in families if f.right is not None)
+    return [f for f in families if f.right is None or f.right.start == first]
+
+
+### counting, enumeration and evaluation ###
+
+
+def postorder(forest: SPPF[NTS, TS], filters: Sequence[Filter]) -> list[Node]:
+    """nodes reachable from the root, children before their parents"""
+    order: list[Node] = []
+    # None: on the current path, True: done
+    state: dict[Node, bool] = {}
+    stack: list[tuple[Node, bool]] = [(forest.root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            state[node] = True
+            order.append(node)
+            continue
+        if node in state:
+            if not state[node]:
+                raise Exception("forest is cyclic, it contains infinitely many trees")
+            continue
+        state[node] = False
+        stack.append((node, True))
+        for family in choices(forest, node, filters):
+            for child in (family.right, family.left):
+                if child is not None and state.get(child) is not True:
+                    stack.append((child, False))
+    return order
+
+
+def count_trees(forest: SPPF[NTS, TS], filters: Sequence[Filter] = ()) -> int:
+    counts: dict[Node, int] = {}
+    for node in postorder(forest, filters):
+        if forest.is_terminal(node):
+            counts[node] = 1
+            continue
+        counts[node] = sum(
+            (counts[f.left] if f.left is not None else 1)
+            * (counts[f.right] if f.right is not None else 1)
+            for f in choices(forest, node, filters)
+        )
+    return counts[forest.root]
+
+
+def evaluate(forest: SPPF[NTS, TS], filters: Sequence[Filter] = ()) -> Any:
+    """value (see Production.ext) of one tree, the first family of a node is taken
+    if the filters leave more than one
+
+    Only the nodes of the chosen tree are evaluated, each of them once.
+    """
+    rules = forest.ig.grammar.rules
+    # symbol nodes have values, intermediate nodes lists of argument values
+    values: dict[Node, Any] = {}
+    # the chosen nodes without a value yet are on the current path
+    chosen: dict[Node, Family] = {}
+
+    def arguments(family: Family) -> list[Any]:
+        args = list(values[family.left]) if family.left is not None else []
+        if family.right is not None:
+            args.append(values[family.right])
+        return args
+
+    stack: list[tuple[Node, bool]] = [(forest.root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in values:
+            continue
+        if forest.is_terminal(node):
+            values[node] = forest.tokens[node.start]
+            continue
+        if not expanded:
+            if node in chosen:
+                raise Exception("forest is cyclic, it contains infinitely many trees")
+            families = choices(forest, node, filters)
+            if not families:
+                raise Exception(f"no tree left for {forest.label(node)}")
+            chosen[node] = families[0]
+            stack.append((node, True))
+            for child in (families[0].right, families[0].left):
+                if child is not None and child not in values:
+                    stack.append((child, False))
+            continue
+        family = chosen[node]
+        if isinstance(node, IntermediateNode):
+            values[node] = arguments(family)
+        else:
+            ext = rules[family.production].ext
+            # default construct is None if rule.ext is None
+            values[node] = None if ext is None else ext(*arguments(family))
+    return values[forest.root]
+
+
+def enumerate_values(
+    forest: SPPF[NTS, TS], filters: Sequence[Filter] = ()
+) -> Iterator[Any]:
+    """lazily yields the value of every tree
+
+    The trees are built depth first with an explicit stack of the alternatives
+    not taken yet, so deep trees do not hit the recursion limit.
+    """
+    postorder(forest, filters)  # rejects cyclic forests
+    rules = forest.ig.grammar.rules
+    lengths = [len(rhs) for rhs in forest.ig.rhs]
+    # linked lists (head, tail), shared by the alternatives of a partial tree:
+    # the pending nodes and productions (to reduce), and the values computed
+    # so far (the latest first)
+    Linked = Optional[tuple[Any, Any]]
+
+    def expand(node: Node, family: Family, pending: Linked) -> Linked:
+        if isinstance(node, SymbolNode):
+            pending = (family.production, pending)
+        for child in (family.right, family.left):
+            if child is not None:
+                pending = (child, pending)
+        return pending
+
+    alternatives: list[tuple[Linked, Linked]] = [((forest.root, None), None)]
+    while alternatives:
+        pending, values = alternatives.pop()
+        while pending is not None:
+            task, pending = pending
+            if isinstance(task, int):
+                args = []
+                for _ in range(lengths[task]):
+                    value, values = values
+                    args.append(value)
+                ext = rules[task].ext
+                # default construct is None if rule.ext is None
+                values = (None if ext is None else ext(*reversed(args)), values)
+            elif forest.is_terminal(task):
+                values = (forest.tokens[task.start], values)
+            else:
+                families = choices(forest, task, filters)
+                if not families:
+                    break
+                for family in reversed(families[1:]):
+                    alternatives.append((expand(task, family, pending), values))
+                pending = expand(task, families[0], pending)
+        else:
+            yield cast(tuple[Any, Any], values)[0]
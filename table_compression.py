@@ -0,0 +1,209 @@
+import os
+import pickle
+from array import array
+from collections import Counter
+from grammar import *
+from dataclasses import dataclass
+from indexed_grammar import *
+from lr_tables import ERROR, Conflict, LRTable, slr_table
+from profiling import Profile
+from scanner import Token
+from typing import Callable, Iterable, Optional
+
+
+### compressed LR tables ###
+
+
+"""
+ACTION rows are stored without their most frequent reduction (the default
+reduction of the state) and GOTO columns without their most frequent target.
+The remaining entries are packed into one vector by row displacement (comb
+vector): entry (row, column) lives at index base[row] + column if check at that
+index is row, otherwise the default applies.
+
+Default reductions delay the detection of errors by some reductions, but no
+erroneous terminal is ever shifted. Accepting is never a default.
+"""
+
+
+@dataclass(frozen=True)
+class PackedTable:
+    name: str
+    start_production: int
+    # state -> default action (ERROR or a reduction)
+    default_action: array
+    action_base: array
+    action_next: array
+    action_check: array
+    # nonterminal -> default state
+    default_goto: array
+    goto_base: array
+    goto_next: array
+    goto_check: array
+    conflicts: tuple[Conflict, ...]
+
+    def size(self) -> int:
+        """number of stored ints"""
+        return sum(
+            len(a)
+            for a in (
+                self.default_action,
+                self.action_base,
+                self.action_next,
+                self.action_check,
+                self.default_goto,
+                self.goto_base,
+                self.goto_next,
+                self.goto_check,
+            )
+        )
+
+
+def pack(rows: list[dict[int, int]]) -> tuple[array, array, array]:
+    """first fit row displacement, denser rows are placed first"""
+    base = array("i", [0] * len(rows))
+    values = array("i")
+    check = array("i")
+    for row in sorted(range(len(rows)), key=lambda r: (-len(rows[r]), r)):
+        columns = sorted(rows[row])
+        if not columns:
+            continue
+        offset = -columns[0]
+        while any(
+            offset + c < len(check) and check[offset + c] != ERROR for c in columns
+        ):
+            offset += 1
+        size = offset + columns[-1] + 1
+        if size > len(check):
+            values.extend([ERROR] * (size - len(check)))
+            check.extend([ERROR] * (size - len(check)))
+        for c in columns:
+            values[offset + c] = rows[row][c]
+            check[offset + c] = row
+        base[row] = offset
+    return base, values, check
+
+
+def compress(table: LRTable, profile: Optional[Profile] = None) -> PackedTable:
+    accept = (table.start_production << 1) | 1
+    # a default reduction would hide the errors of nonassociative operators
+    exact = {state for state, _ in table.nonassoc}
+    default_action = array("i")
+    action_rows: list[dict[int, int]] = []
+    for state, row in enumerate(table.action):
+        reductions = Counter(a for a in row if a & 1 and a != ERROR and a != accept)
+        default = ERROR
+        if reductions and state not in exact:
+            default = reductions.most_common(1)[0][0]
+        default_action.append(default)
+        action_rows.append(
+            {t: a for t, a in enumerate(row) if a != ERROR and a != default}
+        )
+
+    nonterminals = len(table.goto[0]) if table.goto else 0
+    default_goto = array("i")
+    goto_columns: list[dict[int, int]] = []
+    for n in range(nonterminals):
+        targets = Counter(row[n] for row in table.goto if row[n] != ERROR)
+        default = targets.most_common(1)[0][0] if targets else ERROR
+        default_goto.append(default)
+        goto_columns.append(
+            {
+                state: row[n]
+                for state, row in enumerate(table.goto)
+                if row[n] != ERROR and row[n] != default
+            }
+        )
+
+    packed = PackedTable(
+        table.name,
+        table.start_production,
+        default_action,
+        *pack(action_rows),
+        default_goto,
+        *pack(goto_columns),
+        table.conflicts,
+    )
+    if profile is not None:
+        profile.count(table.name + " dense entries", sum(map(len, table.action)))
+        profile.count(table.name + " packed entries", packed.size())
+    return packed
+
+
+def save(packed: PackedTable, path: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(packed, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load(path: str) -> PackedTable:
+    with open(path, "rb") as f:
+        packed = pickle.load(f)
+    if not isinstance(packed, PackedTable):
+        raise Exception(f"{path} does not contain a packed LR table")
+    return packed
+
+
+### driver for packed tables ###
+
+
+def drive(
+    ig: IndexedGrammar[NTS, TS], packed: PackedTable, kinds: Iterable[int]
+) -> bool:
+    default_action, action_base = packed.default_action, packed.action_base
+    action_next, action_check = packed.action_next, packed.action_check
+    default_goto, goto_base = packed.default_goto, packed.goto_base
+    goto_next, goto_check = packed.goto_next, packed.goto_check
+    n_action, n_goto = len(action_check), len(goto_check)
+    lengths = [len(rhs) for rhs in ig.rhs]
+    lhs = ig.lhs
+    kinds = iter(kinds)
+    kind = next(kinds, ig.eof)
+    stack = [0]
+    while True:
+        state = stack[-1]
+        i = action_base[state] + kind
+        if 0 <= i < n_action and action_check[i] == state:
+            a = action_next[i]
+        else:
+            a = default_action[state]
+        if a == ERROR:
+            return False
+        if a & 1 == 0:
+            stack.append(a >> 1)
+            kind = next(kinds, ig.eof)
+            continue
+        production = a >> 1
+        if production == packed.start_production:
+            return True
+        if lengths[production]:
+            del stack[-lengths[production] :]
+        state, n = stack[-1], lhs[production]
+        i = goto_base[n] + state
+        if 0 <= i < n_goto and goto_check[i] == n:
+            stack.append(goto_next[i])
+        else:
+            stack.append(default_goto[n])
+
+
+def parse(
+    g: Grammar[NTS, TS],
+    inp: Iterable[TS],
+    eq: Callable[[TS, TS], bool] = equality,
+    packed: Optional[PackedTable] = None,
+) -> bool:
+    """parses inp with the packed SLR(1) table of g unless another table is given"""
+    ig = index_grammar(g)
+    packed = compress(slr_table(g)) if packed is None else packed
+    return drive(ig, packed, map(classifier(ig, eq), inp))
+
+
+# convenience
+def parse_from_string(g: Grammar[NTS, str], inp: str) -> bool:
+    return parse(g, inp, equality)
+
+
+# convenience
+def parse_from_tokens(g: Grammar[NTS, Token], inp: Iterable[Token]) -> bool:
+    return parse(g, inp, token_equality)
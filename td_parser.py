@@ -1,5 +1,6 @@
 from grammar import *
-from typing import Iterator
+from heapq import heappop, heappush
+from typing import Iterable, Iterator, Sequence
 
 
 ### ineffective, nondeterministic top-down parser ###
@@ -23,3 +24,101 @@ def parse(
 # convenience
 def parse_from_string(g: Grammar[NTS, str], s: str) -> Iterator[list[str]]:
     return parse(g, [NT(g.start)], list(s))
+
+
+### memoizing (packrat) top-down parser ###
+
+
+"""
+The end offsets of every (nonterminal, offset) pair that is reached are memoized
+and computed by a worklist instead of recursion, so the nesting depth of the
+input is not limited by the Python stack. A pair that is read before it is
+computed (e.g. by left recursion) yields its current, initially empty, set of
+end offsets and every pair remembers which pairs read it. Whenever the set of a
+pair grows, only these readers are recomputed, until no set changes anymore.
+Pairs are (re)computed in the reverse order of their discovery, i.e. the most
+deeply nested first, so that a change usually reaches each reader once.
+"""
+
+
+def end_offsets(
+    g: Grammar[NTS, TS], alpha: list[Symbol], inp: Sequence[TS], offset: int = 0
+) -> frozenset[int]:
+    """offsets i such that alpha derives inp[offset:i]"""
+    by_lhs: dict[NTS, list[tuple[Symbol, ...]]] = {nt: [] for nt in g.nonterminals}
+    for rule in g.rules:
+        by_lhs[rule.lhs].append(rule.rhs)
+    # pairs are numbered in the order of their discovery, 0 stands for alpha
+    keys: list[tuple[NTS, int]] = [(g.start, offset)]
+    numbers: dict[tuple[NTS, int], int] = {}
+    memo: list[frozenset[int]] = [frozenset()]
+    readers: list[set[int]] = [set()]
+    # heap of the negated numbers of the pairs to (re)compute
+    worklist: list[int] = [0]
+    queued: set[int] = {0}
+
+    def lookup(key: tuple[NTS, int], reader: int) -> frozenset[int]:
+        number = numbers.get(key)
+        if number is None:
+            number = numbers[key] = len(keys)
+            keys.append(key)
+            memo.append(frozenset())
+            readers.append(set())
+            heappush(worklist, -number)
+            queued.add(number)
+        readers[number].add(reader)
+        return memo[number]
+
+    def sequence(
+        reader: int, alpha: Iterable[Symbol], offsets: frozenset[int]
+    ) -> frozenset[int]:
+        for sym in alpha:
+            if not offsets:
+                break
+            match sym:
+                case NT(nt):
+                    offsets = frozenset(
+                        e for i in offsets for e in lookup((nt, i), reader)
+                    )
+                case ts:
+                    offsets = frozenset(
+                        i + 1 for i in offsets if i < len(inp) and inp[i] == ts
+                    )
+        return offsets
+
+    while worklist:
+        number = -heappop(worklist)
+        queued.discard(number)
+        if number == 0:
+            new = sequence(0, alpha, frozenset([offset]))
+        else:
+            nt, i = keys[number]
+            start = frozenset([i])
+            new = frozenset().union(
+                *(sequence(number, rhs, start) for rhs in by_lhs[nt])
+            )
+        # sets only grow, since the sets they are computed from only grow
+        if new != memo[number]:
+            memo[number] = new
+            for reader in readers[number] - queued:
+                heappush(worklist, -reader)
+                queued.add(reader)
+    return memo[0]
+
+
+def memo_parse(
+    g: Grammar[NTS, TS], alpha: list[Symbol], inp: Sequence[TS]
+) -> Iterator[list[TS]]:
+    """like parse, but every rest of the input is yielded once"""
+    for end in sorted(end_offsets(g, alpha, inp)):
+        yield list(inp[end:])
+
+
+# convenience
+def memo_parse_from_string(g: Grammar[NTS, str], s: str) -> Iterator[list[str]]:
+    return memo_parse(g, [NT(g.start)], s)
+
+
+# convenience
+def recognize_from_string(g: Grammar[NTS, str], s: str) -> bool:
+    return len(s) in end_offsets(g, [NT(g.start)], s)
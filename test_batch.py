@@ -0,0 +1,21 @@
+### use pytest to test this file ###
+
+import javascript_arithmetics_parser as jap
+from batch import *
+
+
+def test_chunks():
+    assert list(chunks(range(5), 2)) == [(0, [0, 1]), (2, [2, 3]), (4, [4])]
+    assert list(chunks([], 2)) == []
+
+
+def test_parse_batch():
+    inputs = ["return (xpos+ypos) / 2", "a+", '"x', "x*3"] * 3
+    results = jap.lex_and_parse_all(inputs, 2)
+    assert results == parse_batch(jap.prepare, inputs, workers=0)
+    assert results[0] == jap.lex_and_parse(inputs[0])
+    assert results[1] == (False, None)
+    assert results[3] == jap.lex_and_parse(inputs[3])
+    assert [r.index for r in results if isinstance(r, Failure)] == [2, 6, 10]
+    assert results[2].error == "ScanError"
+    assert jap.lex_and_parse_all([], 2) == []
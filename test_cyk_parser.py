@@ -0,0 +1,40 @@
+### use pytest to test this file ###
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar
+from cyk_parser import *
+from earley_parser import recognize as earley_recognize
+from scanner import make_scanner
+from test_earley_parser import ambiguous_grammar
+
+
+def test_recognize():
+    inputs = ["x+2*(x+x)", "x", "(x)*2", "x+", "", "()", "x+2*(x+x", "((((x))))"]
+    assert recognize_all(expr_grammar, inputs) == [
+        earley_recognize(expr_grammar, inp) for inp in inputs
+    ]
+    assert recognize_from_string(ambiguous_grammar, "a" * 40)
+    assert not recognize_from_string(ambiguous_grammar, "a" * 20 + "b")
+
+
+def test_tokens():
+    g = tll.complex_grammar
+    parse = lambda inp: recognize_from_tokens(g, make_scanner(ts.scan_complex, inp))
+    assert parse("10 + hello - (a - a)")
+    assert not parse("(0 * ((1 * (2)) * 3)")
+
+
+def test_empty():
+    g = Grammar[str, str](
+        ("S",),
+        ("a", "b"),
+        (Production("S", ("a", NT("S"), "b")), Production("S", ())),
+        "S",
+    )
+    assert recognize_all(g, ["", "ab", "aabb", "aab"]) == [True, True, True, False]
@@ -0,0 +1,71 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar
+from earley_parser import *
+from scanner import make_scanner
+from sppf import *
+from test_lalr_tables import merge_grammar
+
+# S -> S S | a
+ambiguous_grammar = Grammar[str, str](
+    ("S",),
+    ("a",),
+    (Production("S", (NT("S"), NT("S"))), Production("S", ("a",))),
+    "S",
+)
+
+# L -> a L | epsilon
+right_recursive_grammar = Grammar[str, str](
+    ("L",),
+    ("a",),
+    (Production("L", ("a", NT("L"))), Production("L", ())),
+    "L",
+)
+
+
+def test_recognize():
+    for g in [expr_grammar, merge_grammar, tll.recursive_grammar]:
+        for inp in ["x+2*(x+x)", "acd", "bce", "bab", "ab", "x+", "ace", "", "bc"]:
+            assert recognize(g, inp) == (parse_from_string(g, inp) is not None)
+    assert recognize(expr_grammar, "x+2*(x+x)")
+    assert not recognize(expr_grammar, "x+2*(x+x")
+    assert recognize(merge_grammar, "bce")
+    assert recognize(right_recursive_grammar, "a" * 2000)
+    assert recognize(right_recursive_grammar, "")
+    assert not recognize(right_recursive_grammar, "aab")
+
+
+def test_leo():
+    ig = index_grammar(right_recursive_grammar)
+    for n in [100, 200]:
+        sets, completed = earley_sets(right_recursive_grammar, ig, [0] * n, True)
+        # a constant number of items per set instead of a linear one
+        assert sum(map(len, sets)) <= 5 * (n + 1)
+        assert 0 in completed[n][ig.start]
+
+
+def test_epsilon():
+    g = tll.complex_grammar
+    parse = lambda inp: parse_from_tokens(g, make_scanner(ts.scan_complex, inp))
+    assert parse("10 + hello - (a - a)") is not None
+    assert parse("(0 * ((1 * (2)) * 3)") is None
+
+
+def test_forest():
+    forest = parse_from_string(expr_grammar, "x+x")
+    assert forest is not None and not forest.is_ambiguous()
+    assert forest.label(forest.root) == "(T, 0, 3)"
+    [family] = forest.families[forest.root]
+    assert expr_grammar.rules[family.production].rhs[1] == "+"
+    assert forest.label(family.left) == "(T -> T '+' . E, 0, 2)"
+    assert forest.label(family.right) == "(E, 2, 3)"
+
+    # (aa)a and a(aa)
+    forest = parse_from_string(ambiguous_grammar, "aaa")
+    assert forest.is_ambiguous()
+    assert len(forest.families[forest.root]) == 2
+    # cubic size although the number of trees grows exponentially
+    assert len(parse_from_string(ambiguous_grammar, "a" * 30).families) < 30**3
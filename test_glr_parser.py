@@ -0,0 +1,91 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar
+from earley_parser import parse as earley_parse
+from glr_parser import *
+from scanner import make_scanner
+from test_earley_parser import ambiguous_grammar, right_recursive_grammar
+from test_lalr_tables import merge_grammar
+
+# E -> E + E | E * E | x
+operator_grammar = start_separated(
+    Grammar[str, str](
+        ("E",),
+        ("x", "+", "*"),
+        (
+            Production("E", (NT("E"), "+", NT("E"))),
+            Production("E", (NT("E"), "*", NT("E"))),
+            Production("E", ("x",)),
+        ),
+        "E",
+    ),
+    "S'",
+)
+
+# S -> A S b | x, A -> epsilon (hidden left recursion)
+hidden_grammar = start_separated(
+    Grammar[str, str](
+        ("S", "A"),
+        ("x", "b"),
+        (
+            Production("S", (NT("A"), NT("S"), "b")),
+            Production("S", ("x",)),
+            Production("A", ()),
+        ),
+        "S",
+    ),
+    "S'",
+)
+
+
+def same_forest(g, inp):
+    glr = parse_from_string(g, inp)
+    earley = earley_parse(g, inp)
+    if glr is None or earley is None:
+        return glr is None and earley is None
+    del earley.families[earley.root]
+    return {n: set(f) for n, f in glr.families.items()} == {
+        n: set(f) for n, f in earley.families.items()
+    }
+
+
+def test_deterministic():
+    g = start_separated(expr_grammar, "S'")
+    for inp in ["x+2*(x+x)", "x", "x+", "(x", ""]:
+        assert same_forest(g, inp)
+    forest = parse_from_string(g, "x+2*(x+x)")
+    assert not forest.is_ambiguous()
+    assert parse_from_tokens(
+        start_separated(tll.complex_grammar, "S'"),
+        make_scanner(ts.scan_complex, "10 + hello - (a - a)"),
+    )
+
+
+def test_ambiguous():
+    for inp in ["x+x*x", "x+x+x+x", "x*", "x"]:
+        assert same_forest(operator_grammar, inp)
+    forest = parse_from_string(operator_grammar, "x+x*x")
+    # (x+x)*x and x+(x*x)
+    assert len(forest.families[forest.root]) == 2
+    g = start_separated(ambiguous_grammar, "S'")
+    for n in range(1, 8):
+        assert same_forest(g, "a" * n)
+
+
+def test_conflicts():
+    # reduce/reduce conflicts of the LALR(1) table are followed
+    for inp in ["acd", "ace", "bcd", "bce", "bc"]:
+        assert same_forest(merge_grammar, inp)
+    assert parse_from_string(merge_grammar, "bce") is not None
+
+
+def test_epsilon():
+    for inp in ["x", "xb", "xbb", "xbbb", "b", ""]:
+        assert same_forest(hidden_grammar, inp)
+    assert parse_from_string(hidden_grammar, "xbbb") is not None
+    g = start_separated(right_recursive_grammar, "S'")
+    for inp in ["", "a", "aaaa"]:
+        assert same_forest(g, inp)
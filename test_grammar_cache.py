@@ -0,0 +1,70 @@
+### use pytest to test this file ###
+
+import os
+import grammar_cache as gc
+from grammar import *
+from grammar_analysis import FirstKAnalysis, FollowKAnalysis
+from grammar_cache import GrammarCache, fingerprint, first_k_analysis
+from grammar_cache import follow_k_analysis
+import test_ll_k_parser as tll
+
+
+def test_fingerprint():
+    g = tll.recursive_grammar
+    assert fingerprint(g, 1) == fingerprint(g, 1)
+    assert fingerprint(g, 1) != fingerprint(g, 2)
+    # semantic actions do not influence the fingerprint
+    with_ext = Grammar[str, str](
+        g.nonterminals,
+        g.terminals,
+        tuple(Production(r.lhs, r.rhs, lambda *args: args) for r in g.rules),
+        g.start,
+    )
+    assert fingerprint(g, 1) == fingerprint(with_ext, 1)
+    # changing the terminals changes the fingerprint
+    assert fingerprint(tll.complex_grammar, 1) != fingerprint(
+        Grammar[str, str](
+            tll.complex_grammar.nonterminals,
+            tll.complex_grammar.terminals[:-1],
+            tll.complex_grammar.rules,
+            tll.complex_grammar.start,
+        ),
+        1,
+    )
+
+
+def test_memory_cache():
+    cache = GrammarCache()
+    g = tll.complex_grammar
+    calls = []
+    compute = lambda: calls.append(1) or FirstKAnalysis(1).run(g)
+    first = cache.lookup("first_k", g, 1, compute)
+    assert cache.lookup("first_k", g, 1, compute) is first
+    assert len(calls) == 1
+    cache.invalidate(g, 1)
+    assert cache.lookup("first_k", g, 1, compute) == first
+    assert len(calls) == 2
+
+
+def test_disk_cache(tmp_path):
+    g = tll.complex_grammar
+    cache = GrammarCache(str(tmp_path))
+    follow = follow_k_analysis(g, 1, cache)
+    assert follow == FollowKAnalysis(1, FirstKAnalysis(1).run(g)).run(g)
+    assert len(os.listdir(tmp_path)) == 2
+
+    # a fresh process starts warm from disk
+    warm = GrammarCache(str(tmp_path))
+    assert first_k_analysis(g, 1, warm) == first_k_analysis(g, 1, cache)
+    assert warm.lookup("follow_k", g, 1, lambda: None) == follow
+
+    # results of an outdated format are recomputed
+    gc.CACHE_VERSION += 1
+    try:
+        stale = GrammarCache(str(tmp_path))
+        assert stale.lookup("follow_k", g, 1, lambda: "recomputed") == "recomputed"
+    finally:
+        gc.CACHE_VERSION -= 1
+
+    cache.invalidate()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,42 @@
+### use pytest to test this file ###
+
+import json
+from grammar import *
+from grammar_analysis import FirstKAnalysis
+from grammar_stats import grammar_profile
+from ll_k_parser import ll_table
+from profiling import Profile
+from arithmetics_parser import expr_grammar, expr_grammar_
+import test_ll_k_parser as tll
+
+
+def test_analysis_profile():
+    profile = Profile()
+    first_1 = FirstKAnalysis[str, str](1).run(expr_grammar_, profile)
+    assert first_1 == FirstKAnalysis[str, str](1).run(expr_grammar_)
+    assert profile.iterations["FirstKAnalysis"] > 1
+    assert profile.set_sizes["FirstKAnalysis"] == {
+        str(n): len(first_1[n]) for n in expr_grammar_.nonterminals
+    }
+    assert "FirstKAnalysis" in profile.phases
+
+
+def test_grammar_profile():
+    profile = grammar_profile(tll.recursive_grammar, 1)
+    assert profile.counters["productions"] == 3
+    assert profile.counters["LR(0) item sets"] == 7
+    assert profile.conflicts == []
+    report = json.loads(profile.to_json())
+    assert set(report["set_sizes"]) == {"FirstKAnalysis", "FollowKAnalysis"}
+
+    # expr_grammar is LR(1) but not LR(0)
+    profile = grammar_profile(expr_grammar, 1)
+    assert len(profile.conflicts) == 3
+    assert profile.counters["LR(0) conflicts"] == 3
+    for name in ["SLR(1)", "LALR(1)", "LR(1)"]:
+        assert profile.counters[name + " conflicts"] == 0
+    # left recursion is not LL(1)
+    assert profile.counters["LL(1) conflicts"] == len(
+        ll_table(expr_grammar, 1).conflicts
+    )
+    assert profile.counters["LL(1) conflicts"] > 0
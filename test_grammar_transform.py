@@ -0,0 +1,167 @@
+### use pytest to test this file ###
+
+from grammar import *
+from grammar_transform import *
+import javascript_arithmetics_parser as jap
+from arithmetics_parser import expr_grammar, flat_expr_grammar, BinOp, Var, Const
+from ll_k_parser import parse_from_string as ll_k_parse_from_string
+from lr_k_parser import parse_from_string, parse_from_tokens
+from javascript_scanner import js_token
+from earley_parser import recognize, parse_from_string as earley_parse_from_string
+from sppf import evaluate
+from lalr_tables import build_lalr_table
+from lr_tables import parse_ast
+import test_ll_k_parser as tll
+from scanner import make_scanner
+
+
+def test_reduce():
+    g = Grammar[str, str](
+        ("S", "A", "B", "C"),
+        ("a", "b"),
+        (
+            Production("S", ("a",)),
+            Production("S", (NT("A"),)),
+            Production("A", ("a", NT("A"))),  # non-productive
+            Production("B", ("b",)),  # unreachable
+            Production("C", (NT("S"),)),  # unreachable
+        ),
+        "S",
+    )
+    reduced = reduce_grammar(g)
+    assert reduced.nonterminals == ("S",)
+    assert reduced.rules == (Production("S", ("a",)),)
+
+
+def test_epsilon():
+    g = Grammar[str, str](
+        ("S", "L"),
+        ("(", ")", "x"),
+        (
+            Production("S", ("(", NT("L"), ")"), lambda l, xs, r: xs),
+            Production("L", ("x", NT("L")), lambda x, xs: [x] + xs),
+            Production("L", (), lambda: []),
+        ),
+        "S",
+    )
+    transformed = eliminate_epsilon(g)
+    assert all(len(rule.rhs) > 0 for rule in transformed.rules)
+    for inp in ["()", "(x)", "(xxx)"]:
+        assert parse_from_string(
+            start_separated(transformed, "S'"), 1, inp
+        ) == parse_from_string(start_separated(g, "S'"), 1, inp)
+
+    nullable_start = Grammar[str, str](("L",), ("x",), g.rules[1:], "L")
+    transformed = eliminate_epsilon(nullable_start)
+    assert transformed.start == "L'"
+    assert [rule.rhs for rule in transformed.productions_with_lhs("L'")] == [
+        (NT("L"),),
+        (),
+    ]
+    for inp in ["", "x", "xxx"]:
+        assert parse_from_string(
+            start_separated(transformed, "S'"), 1, inp
+        ) == parse_from_string(start_separated(nullable_start, "S'"), 1, inp)
+
+
+def test_units():
+    transformed = eliminate_units(jap.grammar)
+    assert not any(is_unit(rule) for rule in transformed.rules)
+    for inp in ["return (xpos+ypos) / 2", "1 * (2 + x)", "x"]:
+        tokens = list(make_scanner(js_token, inp))
+        assert parse_from_tokens(
+            start_separated(transformed, "S'"), 1, tokens
+        ) == jap.lex_and_parse(inp)
+
+
+def test_units_precedence():
+    # E -> E + E | N | x, N -> - E with the precedence of u (above +)
+    g = Grammar[str, str](
+        ("E", "N"),
+        ("x", "+", "-", "u"),
+        (
+            Production("E", (NT("E"), "+", NT("E")), lambda l, op, r: BinOp(l, op, r)),
+            Production("E", (NT("N"),), lambda n: n),
+            Production("E", ("x",), lambda x: Var(x)),
+            Production(
+                "N", ("-", NT("E")), lambda op, e: BinOp(Const("0"), op, e), "u"
+            ),
+        ),
+        "E",
+        (Precedence("left", ("+",)), Precedence("right", ("u",))),
+    )
+    transformed = start_separated(eliminate_units(g), "S'")
+    assert Production("E", ("-", NT("E")), None, "u") in [
+        Production(r.lhs, r.rhs, None, r.prec) for r in transformed.rules
+    ]
+    table = build_lalr_table(transformed)
+    assert table.conflicts == ()
+    negated = BinOp(Const("0"), "-", Var("x"))
+    assert parse_ast(transformed, "-x+x", table=table) == (
+        True,
+        BinOp(negated, "+", Var("x")),
+    )
+
+
+def test_left_recursion():
+    transformed = preprocess(expr_grammar, left_recursion=True)
+    assert not any(rule.rhs[:1] == (NT(rule.lhs),) for rule in transformed.rules)
+    for inp in ["x", "x+2*(x+x)*x+x", "(2)*x*x"]:
+        assert ll_k_parse_from_string(transformed, 1, inp)
+        assert parse_from_string(
+            start_separated(transformed, "S'"), 1, inp
+        ) == parse_from_string(start_separated(expr_grammar, "S'"), 1, inp)
+    assert not ll_k_parse_from_string(transformed, 1, "x+")
+
+    indirect = Grammar[str, str](
+        ("A", "B"),
+        ("a", "b"),
+        (
+            Production("A", (NT("B"), "a"), lambda b, a: (b, a)),
+            Production("A", ("a",), lambda a: a),
+            Production("B", (NT("A"), "b"), lambda a, b: (a, b)),
+        ),
+        "A",
+    )
+    transformed = eliminate_left_recursion(indirect)
+    assert ll_k_parse_from_string(transformed, 2, "aba")
+    assert ll_k_parse_from_string(transformed, 2, "ababa")
+    assert not ll_k_parse_from_string(transformed, 2, "abb")
+
+
+def test_cnf():
+    for g in [expr_grammar, tll.complex_grammar, tll.recursive_grammar]:
+        assert is_cnf(to_cnf(g))
+    assert not is_cnf(expr_grammar)
+    cnf = to_cnf(expr_grammar)
+    for inp in ["x+2*(x+x)", "x", "(x)*2", "x+", "", "()"]:
+        assert recognize(cnf, inp) == recognize(expr_grammar, inp)
+    # constructs are preserved by the split rules
+    assert evaluate(earley_parse_from_string(cnf, "(x+2)*x")) == BinOp(
+        BinOp(Var("x"), "+", Const("2")), "*", Var("x")
+    )
+
+    # S -> a S b | epsilon
+    g = Grammar[str, str](
+        ("S",),
+        ("a", "b"),
+        (Production("S", ("a", NT("S"), "b")), Production("S", ())),
+        "S",
+    )
+    cnf = to_cnf(g)
+    assert is_cnf(cnf) and cnf.start != "S"
+    for inp in ["", "ab", "aabb", "aab", "ba"]:
+        assert recognize(cnf, inp) == recognize(g, inp)
+
+    # the rules split from E -> E + E and E -> E * E keep their precedence
+    cnf = to_cnf(flat_expr_grammar)
+    assert {rule.prec for rule in cnf.rules if len(rule.rhs) == 2} == {"+", "*", None}
+
+
+def test_preprocess():
+    transformed = preprocess(expr_grammar)
+    assert not any(is_unit(rule) for rule in transformed.rules)
+    assert parse_from_string(start_separated(transformed, "S'"), 1, "x*(2+x)") == (
+        True,
+        BinOp(Var("x"), "*", BinOp(Const("2"), "+", Var("x"))),
+    )
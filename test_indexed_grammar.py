@@ -0,0 +1,73 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_ll_k_parser as tll
+from indexed_grammar import *
+from lr_0_parser import Item, decode_item
+from scanner import make_scanner
+import test_scanner as ts
+
+
+def test_encoding():
+    g = start_separated(tll.recursive_grammar, "S'")
+    ig = index_grammar(g)
+    assert index_grammar(g) is ig
+    assert ig.terminals == ("a", "b")
+    assert ig.eof == 2 and ig.unknown == 3
+    assert ig.symbol(NT("S")) == ~0 and ig.symbol("b") == 1
+    assert ig.rhs[0] == (~1, ~0)
+    assert ig.stride == 3
+    item = ig.item(1, 1)
+    assert ig.production(item) == 1 and ig.position(item) == 1
+    assert decode_item(ig, item) == Item(g.rules[1], 1)
+    assert ig.next_symbol[item] == ~1
+    assert ig.next_symbol[ig.item(2, 1)] is None
+
+
+def test_closure():
+    g = start_separated(tll.recursive_grammar, "S'")
+    ig = index_grammar(g)
+    state = ig.closure([ig.item(3)])
+    # S' -> .S, S -> .T S, S -> .a T, T -> .b
+    assert state == frozenset([ig.item(3), ig.item(0), ig.item(1), ig.item(2)])
+    assert ig.goto(state, ig.symbol("b")) == frozenset([ig.item(2, 1)])
+    assert ig.goto(state, ig.symbol(NT("T"))) == frozenset(
+        [ig.item(0, 1), ig.item(0), ig.item(1), ig.item(2)]
+    )
+
+
+def test_classifier():
+    ig = index_grammar(tll.complex_grammar)
+    kind = classifier(ig, token_equality)
+    tokens = list(make_scanner(ts.scan_complex, "(a + 1)"))
+    assert list(map(kind, tokens)) == [3, 1, 2, 0, 4]
+    assert kind(ts.End()) == ig.unknown
+    by_kind = classifier(ig, kind_equality)
+    assert list(map(by_kind, tokens)) == [3, 1, 2, 0, 4]
+    assert by_kind(ts.End()) == ig.unknown
+    assert by_kind(Token()) == ig.unknown
+    assert classifier(index_grammar(tll.recursive_grammar), equality)("c") == 3
+
+
+def test_first_k_ids():
+    first_k = ((), frozenset([(0,), (1, 2)]))
+    assert first_k_ids(2, first_k, [~1, 3]) == frozenset([(0, 3), (1, 2)])
+    assert first_k_ids(2, first_k, [], (4, 5, 6)) == frozenset([(4, 5)])
+
+
+def test_token_stream():
+    ig = index_grammar(tll.recursive_grammar)
+    pulled = []
+
+    def symbols():
+        for c in "bac":
+            pulled.append(c)
+            yield c
+
+    tokens = token_stream(ig, symbols(), equality)
+    assert tokens.first() == 1 and pulled == ["b"]
+    assert tokens.peek(2) == (1, 0) and pulled == ["b", "a"]
+    assert tokens.advance() == "b"
+    assert tokens.peek(5) == (0, ig.unknown)
+    assert tokens.advance() == "a" and tokens.advance() == "c"
+    assert tokens.at_end() and tokens.peek(2) == ()
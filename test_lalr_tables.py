@@ -0,0 +1,152 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar, flat_expr_grammar
+from indexed_grammar import index_grammar, token_stream, equality
+from lalr_tables import *
+from lr_tables import build_slr_table, evaluate
+from profiling import Profile
+from scanner import make_scanner
+
+# LALR(1) but not SLR(1)
+assignment_grammar = start_separated(
+    Grammar[str, str](
+        ("S", "L", "R"),
+        ("=", "*", "i"),
+        (
+            Production("S", (NT("L"), "=", NT("R"))),
+            Production("S", (NT("R"),)),
+            Production("L", ("*", NT("R"))),
+            Production("L", ("i",)),
+            Production("R", (NT("L"),)),
+        ),
+        "S",
+    ),
+    "S'",
+)
+
+# LR(1) but not LALR(1)
+merge_grammar = start_separated(
+    Grammar[str, str](
+        ("S", "A", "B"),
+        ("a", "b", "c", "d", "e"),
+        (
+            Production("S", ("a", NT("A"), "d")),
+            Production("S", ("b", NT("B"), "d")),
+            Production("S", ("a", NT("B"), "e")),
+            Production("S", ("b", NT("A"), "e")),
+            Production("A", ("c",)),
+            Production("B", ("c",)),
+        ),
+        "S",
+    ),
+    "S'",
+)
+
+# ambiguous, made deterministic by precedence declarations
+comparison_grammar = start_separated(
+    Grammar[str, str](
+        ("E",),
+        ("x", "<", "+"),
+        (
+            Production("E", (NT("E"), "<", NT("E"))),
+            Production("E", (NT("E"), "+", NT("E"))),
+            Production("E", ("x",)),
+        ),
+        "E",
+        (Precedence("nonassoc", ("<",)), Precedence("right", ("+",))),
+    ),
+    "S'",
+)
+
+
+def test_digraph():
+    # 0 -> 1 -> 2 -> 1, 3 isolated
+    assert digraph([[1], [2], [1], []], [{0}, {1}, {2}, {3}]) == [
+        {0, 1, 2},
+        {1, 2},
+        {1, 2},
+        {3},
+    ]
+
+
+def test_lalr_not_slr(capfd):
+    assert build_slr_table(assignment_grammar).conflicts != ()
+    profile = Profile()
+    assert build_lalr_table(assignment_grammar, profile).conflicts == ()
+    assert profile.counters["LALR(1) nonterminal transitions"] > 0
+    assert parse_from_string(assignment_grammar, "*i=**i")
+    assert parse_from_string(assignment_grammar, "i")
+    assert not parse_from_string(assignment_grammar, "i=")
+    assert not parse_from_string(assignment_grammar, "i=i=i")
+    out, err = capfd.readouterr()
+    assert "not LALR(1)" not in out
+
+
+def test_not_lalr():
+    conflicts = build_lalr_table(merge_grammar).conflicts
+    assert len(conflicts) == 2
+    assert all(all(a & 1 for a in c.actions) for c in conflicts)
+
+
+def test_epsilon(capfd):
+    # Cont -> epsilon
+    g = start_separated(tll.complex_grammar, "S'")
+    parse = lambda inp: parse_from_tokens(g, list(make_scanner(ts.scan_complex, inp)))
+    assert parse("10 + hello - (a - a)")
+    assert parse("0*((1*(2))*3)")
+    assert not parse("(0 * ((1 * (2)) * 3)")
+    out, err = capfd.readouterr()
+    assert "not LALR(1)" not in out
+
+
+def test_expr():
+    g = start_separated(expr_grammar, "S'")
+    table = build_lalr_table(g)
+    assert table.conflicts == ()
+    # LALR(1) and SLR(1) share the LR(0) automaton
+    assert len(table.action) == len(build_slr_table(g).action)
+    assert parse_from_string(g, "x+2*(x+x)")
+    assert not parse_from_string(g, "x+2*(x+x")
+
+
+def test_precedence():
+    flat = start_separated(flat_expr_grammar, "S'")
+    layered = start_separated(expr_grammar, "S'")
+    profile = Profile()
+    table = build_lalr_table(flat, profile)
+    assert table.conflicts == ()
+    assert profile.counters["LALR(1) precedence decisions"] > 0
+
+    def reductions(g, table, inp):
+        count = 0
+
+        def counting(ext):
+            def counted(*args):
+                nonlocal count
+                count += 1
+                return ext(*args)
+
+            return counted
+
+        rules = [Production(r.lhs, r.rhs, counting(r.ext)) for r in g.rules]
+        ig = index_grammar(g)
+        ok, ast = evaluate(ig, table, token_stream(ig, inp, equality), rules)
+        return ok, ast, count
+
+    for inp in ["x+2*x", "x*2+x", "x+x+x", "x*x*x", "(x+2)*x+2*(x)"]:
+        ok, ast, flat_count = reductions(flat, table, inp)
+        expected, expected_ast, layered_count = reductions(
+            layered, build_lalr_table(layered), inp
+        )
+        assert ok and expected and ast == expected_ast
+        assert flat_count < layered_count
+    assert not parse_from_string(flat, "x+*x")
+
+    # nonassociative operators can not be chained
+    table = build_lalr_table(comparison_grammar)
+    assert table.conflicts == () and table.nonassoc
+    assert parse_from_string(comparison_grammar, "x<x+x+x")
+    assert not parse_from_string(comparison_grammar, "x<x<x")
@@ -2,7 +2,15 @@
 
 from grammar import *
 import test_scanner as ts
-from ll_k_parser import parse_from_string, parse_from_tokens
+from ll_k_parser import parse_from_string, parse_from_tokens, build_ll_table
+from ll_k_parser import ll_table
+from ll_k_parser import parse_ast_from_string, parse_ast_from_tokens, parse_postfix
+from ll_k_parser import LLParser
+from concurrent.futures import ThreadPoolExecutor
+from profiling import Profile
+from arithmetics_parser import expr_grammar, BinOp, Var, Const
+from grammar_transform import preprocess
+from lr_k_parser import parse_from_string as lr_k_parse_from_string
 from scanner import Token, Scan, make_scanner
 
 
@@ -33,7 +41,7 @@ recursive_grammar = Grammar[str, str](
 )
 
 
-def test_recursive(capfd):
+def test_recursive():
     assert not parse_from_string(recursive_grammar, 1, "")
     assert not parse_from_string(recursive_grammar, 1, "ba")
     assert parse_from_string(recursive_grammar, 1, "ab")
@@ -41,11 +49,8 @@ def test_recursive(capfd):
     assert parse_from_string(recursive_grammar, 1, "bbab")
     assert not parse_from_string(recursive_grammar, 1, "bcab")
     assert not parse_from_string(recursive_grammar, 1, "bbabb")
-    out, err = capfd.readouterr()
-    assert "not LL(1)" not in out
-    parse_from_string(recursive_grammar, 0, "bbab")
-    out, err = capfd.readouterr()
-    assert "not LL(0)" in out
+    assert ll_table(recursive_grammar, 1).conflicts == ()
+    assert ll_table(recursive_grammar, 0).conflicts
 
 
 Number = ts.Number(0)
@@ -70,7 +75,7 @@ complex_grammar = Grammar[str, Token](
 )
 
 
-def test_complex(capfd):
+def test_complex():
     parse = lambda k, inp: parse_from_tokens(
         complex_grammar, k, list(make_scanner(ts.scan_complex, inp))
     )
@@ -86,8 +91,58 @@ def test_complex(capfd):
     assert not parse(1, "0 * ((1 * (2)) * 3) 4")
     assert not parse(1, "(0 * ((1 * (2)) * 3)")
     assert not parse(1, "(0 * ((1 ** (2)) * 3))")
-    out, err = capfd.readouterr()
-    assert "not LL(1)" not in out
-    parse(0, "(0 * ((1 * (2)) * 3))")
-    out, err = capfd.readouterr()
-    assert "not LL(0)" in out
+    assert ll_table(complex_grammar, 1).conflicts == ()
+    assert ll_table(complex_grammar, 0).conflicts
+
+
+def test_table():
+    table = build_ll_table(recursive_grammar, 1)
+    # S -> T S on b, S -> a T on a, T -> b on b
+    assert table.table == {(0, (1,)): 0, (0, (0,)): 1, (1, (1,)): 2}
+    assert table.conflicts == ()
+    profile = Profile()
+    table = build_ll_table(recursive_grammar, 0, profile)
+    assert table.conflicts == ((0, (), (0, 1)),)
+    assert len(profile.conflicts) == 1
+
+
+def test_long_input():
+    assert parse_from_string(recursive_grammar, 1, "b" * 100000 + "ab")
+    assert not parse_from_string(recursive_grammar, 1, "b" * 100000 + "a")
+    tokens = [ts.Left()] * 20000 + [ts.Number(0)] + [ts.Right()] * 20000
+    assert parse_from_tokens(complex_grammar, 1, tokens)
+    assert not parse_from_tokens(complex_grammar, 1, tokens[:-1])
+
+
+def test_ast():
+    ll_1_grammar = preprocess(expr_grammar, left_recursion=True)
+    lr_1_grammar = start_separated(expr_grammar, "S'")
+    for inp in ["x", "x+2*(x+x)*x+x", "(2)*x*x", "x+", ""]:
+        assert parse_ast_from_string(ll_1_grammar, 1, inp) == lr_k_parse_from_string(
+            lr_1_grammar, 1, inp
+        )
+    assert parse_ast_from_string(ll_1_grammar, 1, "x*2") == (
+        True,
+        BinOp(Var("x"), "*", Const("2")),
+    )
+
+    # rules without ext construct None
+    assert parse_ast_from_tokens(complex_grammar, 1, [Number]) == (True, None)
+
+
+def test_shared_parser():
+    parser = LLParser(preprocess(expr_grammar, left_recursion=True), 1)
+    inputs = ["x", "x+2*(x+x)*x+x", "(2)*x*x", "x+", ""] * 50
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(parser, inputs))
+    assert results == [parser.parse(inp) for inp in inputs]
+    assert results[2] == (True, BinOp(BinOp(Const("2"), "*", Var("x")), "*", Var("x")))
+    assert [parser.recognize(inp) for inp in inputs[:5]] == [True] * 3 + [False] * 2
+
+
+def test_postfix():
+    ok, events = parse_postfix(recursive_grammar, 1, list("bab"))
+    s_ts, s_at, t_b = recursive_grammar.rules
+    assert ok
+    assert events == ["b", t_b, "a", "b", t_b, s_at, s_ts]
+    assert parse_postfix(recursive_grammar, 1, list("ba")) == (False, [])
@@ -0,0 +1,57 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar
+from lalr_tables import build_lalr_table
+from lr_1_tables import *
+from profiling import Profile
+from scanner import make_scanner
+from test_lalr_tables import assignment_grammar, merge_grammar
+
+
+def test_weakly_compatible():
+    # merging would make the lookahead 0 ambiguous between the two items
+    assert not weakly_compatible(
+        {1: frozenset([0]), 2: frozenset([1])}, {1: frozenset([1]), 2: frozenset([0])}
+    )
+    assert weakly_compatible(
+        {1: frozenset([0]), 2: frozenset([1])}, {1: frozenset([0]), 2: frozenset([2])}
+    )
+    # the conflict is already present in the first kernel
+    assert weakly_compatible(
+        {1: frozenset([0, 1]), 2: frozenset([1])},
+        {1: frozenset([1]), 2: frozenset([0])},
+    )
+
+
+def test_not_lalr(capfd):
+    profile = Profile()
+    table = build_lr_1_table(merge_grammar, profile)
+    assert table.conflicts == ()
+    # only the state after c is split
+    assert len(table.action) == len(build_lalr_table(merge_grammar).action) + 1
+    assert profile.counters["LR(1) item sets"] == len(table.action)
+    assert parse_from_string(merge_grammar, "acd")
+    assert parse_from_string(merge_grammar, "ace")
+    assert parse_from_string(merge_grammar, "bcd")
+    assert not parse_from_string(merge_grammar, "bc")
+    out, err = capfd.readouterr()
+    assert "not LR(1)" not in out
+
+
+def test_lalr_size():
+    for g in [assignment_grammar, start_separated(expr_grammar, "S'")]:
+        table = build_lr_1_table(g)
+        assert table.conflicts == ()
+        assert len(table.action) == len(build_lalr_table(g).action)
+
+
+def test_epsilon(capfd):
+    g = start_separated(tll.complex_grammar, "S'")
+    parse = lambda inp: parse_from_tokens(g, list(make_scanner(ts.scan_complex, inp)))
+    assert parse("10 + hello - (a - a)")
+    assert not parse("(0 * ((1 * (2)) * 3)")
+    out, err = capfd.readouterr()
+    assert "not LR(1)" not in out
@@ -1,9 +1,13 @@
 ### use pytest to test this file ###
 
+import pytest
 from grammar import *
 import test_scanner as ts
 import test_ll_k_parser as tll
-from lr_k_parser import parse_from_string, parse_from_tokens
+import arithmetics_parser as ap
+from concurrent.futures import ThreadPoolExecutor
+from lr_k_parser import parse, parse_from_string, parse_from_tokens, lr_k_automaton
+from lr_k_parser import LRParser
 from scanner import Token, Scan, make_scanner
 
 
@@ -40,6 +44,74 @@ def test_recursive(capfd):
     assert "not LR(0)" not in out
 
 
+def test_automaton_reuse():
+    recursive_grammar = start_separated(tll.recursive_grammar, "S'")
+    automaton = lr_k_automaton(recursive_grammar, 1)
+    assert parse_from_string(recursive_grammar, 1, "bbab")[0]
+    explored = len(automaton.states)
+    assert explored > 1
+    # a second parse with an equal grammar reuses the explored states
+    same = start_separated(tll.recursive_grammar, "S'")
+    assert lr_k_automaton(same, 1) is automaton
+    assert parse_from_string(same, 1, "bbab")[0]
+    assert len(automaton.states) == explored
+    assert automaton.goto(0, automaton.ig.symbol("b")) == automaton.goto(
+        0, automaton.ig.symbol("b")
+    )
+
+
+def test_shared_parser():
+    # a start symbol of its own, so the automaton is explored by the threads
+    g = start_separated(ap.expr_grammar, "Shared")
+    inputs = ["x+2*(x+x)", "x*2+x", "((x))", "x+*2", "(x", ""] * 50
+    expected = [
+        parse_from_string(start_separated(ap.expr_grammar, "S'"), 1, inp)
+        for inp in inputs
+    ]
+    for parser in [LRParser(g, 2), LRParser(g, 1), LRParser(g)]:
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(parser, inputs)) == expected
+    assert LRParser(g, 1).table is not None and LRParser(g, 2).automaton is not None
+
+    # only the LR(1) table resolves conflicts by precedence
+    flat = start_separated(ap.flat_expr_grammar, "S'")
+    x = ap.Var("x")
+    assert LRParser(flat)("x*x+x") == (True, ap.BinOp(ap.BinOp(x, "*", x), "+", x))
+    with pytest.raises(Exception):
+        LRParser(flat, 2)
+
+
+def test_deep_input():
+    g = start_separated(ap.expr_grammar, "S'")
+    inp = "(" * 3000 + "x" + ")" * 3000
+    assert parse_from_string(g, 1, inp) == (True, ap.Var("x"))
+
+
+def test_streaming():
+    g = start_separated(ap.expr_grammar, "S'")
+    pulled = []
+    built = []
+
+    def symbols():
+        for c in "x*2+x":
+            pulled.append(c)
+            yield c
+
+    def var(x):
+        # the first AST node is built before the input is read completely
+        built.append(len(pulled))
+        return ap.Var(x)
+
+    g = Grammar(
+        g.nonterminals,
+        g.terminals,
+        tuple(Production(r.lhs, r.rhs, var) if r.rhs == ("x",) else r for r in g.rules),
+        g.start,
+    )
+    assert parse(g, 1, symbols())[0]
+    assert built == [2, 5]
+
+
 def test_complex(capfd):
     complex_grammar = start_separated(tll.complex_grammar, "S'")
     parse = lambda k, inp: parse_from_tokens(
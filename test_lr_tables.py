@@ -0,0 +1,126 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar, BinOp, Var, Const
+from indexed_grammar import index_grammar
+from lr_tables import *
+from profiling import Profile
+from scanner import Token, Scan, make_scanner
+
+
+def test_base_case(capfd):
+    empty = start_separated(Grammar[str, str](("S",), (), (), "S"), "S'")
+    assert not parse_from_string(empty, "")
+    assert not parse_from_string(empty, "x")
+
+    epsilon = start_separated(
+        Grammar[str, str](("S",), (), (Production("S", ()),), "S"), "S'"
+    )
+    assert parse_from_string(epsilon, "")
+    assert not parse_from_string(epsilon, "x")
+
+    single = start_separated(
+        Grammar[str, str](("S",), ("x",), (Production("S", ("x",)),), "S"), "S'"
+    )
+    assert not parse_from_string(single, "")
+    assert parse_from_string(single, "x")
+    assert not parse_from_string(single, "xx")
+    out, err = capfd.readouterr()
+    assert "not SLR(1)" not in out
+
+
+def test_automaton():
+    g = start_separated(tll.recursive_grammar, "S'")
+    ig = index_grammar(g)
+    automaton = lr_0_automaton(ig)
+    assert len(automaton.states) == 7
+    assert automaton.states[0] == ig.closure([ig.item(3)])
+    for state, transitions in zip(automaton.states, automaton.transitions):
+        for sym, target in transitions.items():
+            assert automaton.states[target] == ig.goto(state, sym)
+
+
+def test_recursive(capfd):
+    recursive_grammar = start_separated(tll.recursive_grammar, "S'")
+    assert not parse_from_string(recursive_grammar, "")
+    assert not parse_from_string(recursive_grammar, "ba")
+    assert parse_from_string(recursive_grammar, "ab")
+    assert parse_from_string(recursive_grammar, "bab")
+    assert parse_from_string(recursive_grammar, "bbab")
+    assert not parse_from_string(recursive_grammar, "bcab")
+    assert not parse_from_string(recursive_grammar, "bbabb")
+    out, err = capfd.readouterr()
+    assert "not SLR(1)" not in out
+
+
+def test_expr(capfd):
+    g = start_separated(expr_grammar, "S'")
+    profile = Profile()
+    table = build_slr_table(g, profile)
+    assert table.conflicts == ()
+    assert profile.counters["LR(0) item sets"] == len(table.action)
+    assert parse_from_string(g, "x+2*(x+x)")
+    assert parse_from_string(g, "((x))")
+    assert not parse_from_string(g, "x+*2")
+    assert not parse_from_string(g, "(x")
+    out, err = capfd.readouterr()
+    assert "not SLR(1)" not in out
+
+
+def test_ast():
+    g = start_separated(expr_grammar, "S'")
+    assert parse_ast_from_string(g, "x*2+x") == (
+        True,
+        BinOp(BinOp(Var("x"), "*", Const("2")), "+", Var("x")),
+    )
+    assert parse_ast_from_string(g, "x+") == (False, None)
+    # the driver has no recursion limit
+    ok, ast = parse_ast_from_string(g, "(" * 5000 + "x" + ")" * 5000)
+    assert ok and ast == Var("x")
+
+
+def test_complex(capfd):
+    complex_grammar = start_separated(tll.complex_grammar, "S'")
+    parse = lambda inp: parse_from_tokens(
+        complex_grammar, list(make_scanner(ts.scan_complex, inp))
+    )
+    assert not parse("")
+    assert parse("10 + hello - (a - a)")
+    assert parse("0*((1*(2))*3)")
+    assert not parse("0 * ((1 * (2)) * 3) <=")
+    assert not parse("(0 * ((1 ** (2)) * 3))")
+    out, err = capfd.readouterr()
+    assert "not SLR(1)" not in out
+
+
+def test_kinds():
+    # tokens classified by the kinds numbered in test_scanner.py
+    g = start_separated(tll.complex_grammar, "S'")
+    scan = lambda inp: make_scanner(ts.scan_complex, inp)
+    assert parse(g, scan("10 + hello - (a - a)"), kind_equality)
+    assert not parse(g, scan("(0 * ((1 ** (2)) * 3))"), kind_equality)
+    assert parse_ast(g, scan("a"), kind_equality) == parse_ast_from_tokens(g, scan("a"))
+
+
+def test_conflicts(capfd):
+    ambiguous = start_separated(
+        Grammar[str, str](
+            ("E",),
+            ("x", "+"),
+            (Production("E", (NT("E"), "+", NT("E"))), Production("E", ("x",))),
+            "E",
+        ),
+        "S'",
+    )
+    profile = Profile()
+    table = build_slr_table(ambiguous, profile)
+    assert len(table.conflicts) == 1
+    assert table.conflicts[0].chosen == table.conflicts[0].actions[0]
+    assert "SLR(1) conflict" in profile.conflicts[0]
+    # shifting is preferred, i.e. + is right associative
+    assert parse_from_string(ambiguous, "x+x+x")
+    # conflicts are reported when the table is built, not at parse time
+    out, err = capfd.readouterr()
+    assert "not SLR(1)" not in out
@@ -0,0 +1,118 @@
+### use pytest to test this file ###
+
+import importlib.util
+import pytest
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar, BinOp, Var, Const
+from lr_tables import parse_ast
+from lalr_tables import lalr_table
+from parser_codegen import *
+from scanner import make_scanner
+
+
+def binop(left, op, right):
+    return BinOp(left, op, right)
+
+
+def first(x, *rest):
+    return x
+
+
+def second(x, y, *rest):
+    return y
+
+
+def parse(x):
+    # named like the function of the generated module
+    return Var(x)
+
+
+# expr_grammar with ext functions that are importable by name
+named_expr_grammar = start_separated(
+    Grammar[str, str](
+        ("T", "E", "F"),
+        ("x", "2", "(", ")", "+", "*"),
+        (
+            Production("T", (NT("E"),), first),
+            Production("T", (NT("T"), "+", NT("E")), binop),
+            Production("E", (NT("F"),), first),
+            Production("E", (NT("E"), "*", NT("F")), binop),
+            Production("F", ("x",), Var),
+            Production("F", ("2",), Const),
+            Production("F", ("(", NT("T"), ")"), second),
+        ),
+        "T",
+    ),
+    "S'",
+)
+
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location("generated_parser", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_generate(tmp_path):
+    path = str(tmp_path / "expr_parser.py")
+    write_module(named_expr_grammar, path)
+    source = open(path).read()
+    assert "lalr_tables" not in source and "grammar" not in source
+    generated = load_module(path)
+    for inp in ["x+2*(x+x)", "x*2+x", "((x))", "x+*2", "(x", ""]:
+        assert generated.parse(inp) == parse_ast(
+            named_expr_grammar, list(inp), equality, lalr_table(named_expr_grammar)
+        )
+    assert generated.parse(iter("x*2")) == (True, BinOp(Var("x"), "*", Const("2")))
+
+
+def test_tokens(tmp_path):
+    path = str(tmp_path / "complex_parser.py")
+    g = start_separated(tll.complex_grammar, "S'")
+    write_module(g, path, token_equality)
+    generated = load_module(path)
+    assert generated.parse(make_scanner(ts.scan_complex, "10 + hello - (a - a)"))[0]
+    assert not generated.parse(make_scanner(ts.scan_complex, "(0 * ((1 * (2)) * 3)"))[0]
+    write_module(g, path, kind_equality)
+    by_kind = load_module(path)
+    assert by_kind.parse(make_scanner(ts.scan_complex, "10 + hello - (a - a)"))[0]
+    assert not by_kind.parse(make_scanner(ts.scan_complex, "(0 * ((1 * (2)) * 3)"))[0]
+
+
+def test_lambdas():
+    with pytest.raises(Exception):
+        generate(start_separated(expr_grammar, "S'"))
+
+
+def test_name_collisions(tmp_path, monkeypatch):
+    # another binop from another module
+    (tmp_path / "other_exts.py").write_text(
+        "def binop(left, op, right):\n    return (left, op, right)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    other = importlib.import_module("other_exts")
+    g = start_separated(
+        Grammar[str, str](
+            ("T", "F"),
+            ("x", "+", "*"),
+            (
+                Production("T", (NT("T"), "+", NT("F")), binop),
+                Production("T", (NT("T"), "*", NT("F")), other.binop),
+                Production("T", (NT("F"),), first),
+                Production("F", ("x",), parse),
+            ),
+            "T",
+        ),
+        "S'",
+    )
+    path = str(tmp_path / "collisions_parser.py")
+    write_module(g, path)
+    generated = load_module(path)
+    x = Var("x")
+    assert generated.parse("x+x*x") == (True, (BinOp(x, "+", x), "*", x))
+    assert generated.parse("x+x*x") == parse_ast(
+        g, list("x+x*x"), equality, lalr_table(g)
+    )
@@ -0,0 +1,95 @@
+### use pytest to test this file ###
+
+import asyncio
+import pytest
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar, BinOp, Var, Const
+from lalr_tables import lalr_table
+from lr_tables import parse, parse_ast_from_tokens
+from push_parser import *
+from scanner import async_scanner, make_scanner
+
+# statements separated by ";", every statement is emitted when it is complete
+statements_grammar = start_separated(
+    Grammar[str, str](
+        ("Statements", "Statement", "T", "E", "F"),
+        ("x", "2", "(", ")", "+", "*", ";"),
+        (
+            Production("Statements", (NT("Statements"), NT("Statement"))),
+            Production("Statements", ()),
+            Production("Statement", (NT("T"), ";"), lambda t, semicolon: t),
+        )
+        + expr_grammar.rules,
+        "Statements",
+    ),
+    "S'",
+)
+
+
+def test_feed():
+    parser = PushParser(start_separated(expr_grammar, "S'"))
+    for token in "x*2+":
+        assert parser.feed(token) == []
+    assert parser.feed("x") == []
+    assert parser.feed_eof() == [BinOp(BinOp(Var("x"), "*", Const("2")), "+", Var("x"))]
+    with pytest.raises(ParseError):
+        parser.feed("x")
+    parser.reset()
+    parser.feed("(")
+    with pytest.raises(ParseError):
+        parser.feed(")")
+    parser.reset()
+    parser.feed("x")
+    parser.feed("+")
+    with pytest.raises(ParseError):
+        parser.feed_eof()
+
+
+def test_nonassoc():
+    # E -> E < E | x, x<x<x is rejected, so E < E must not be reduced eagerly
+    g = start_separated(
+        Grammar[str, str](
+            ("E",),
+            ("x", "<"),
+            (Production("E", (NT("E"), "<", NT("E"))), Production("E", ("x",))),
+            "E",
+            (Precedence("nonassoc", ("<",)),),
+        ),
+        "S'",
+    )
+    for inp in ["x<x<x", "x<x", "x"]:
+        parser = PushParser(g)
+        try:
+            for token in inp:
+                parser.feed(token)
+            parser.feed_eof()
+            accepted = True
+        except ParseError:
+            accepted = False
+        assert accepted == parse(g, inp, table=lalr_table(g))
+
+
+def test_emit():
+    parser = PushParser(statements_grammar, emit=["Statement"])
+    emitted = [value for token in "x+2;(x);x*x" for value in parser.feed(token)]
+    # a statement is complete when ";" is seen
+    assert emitted == [BinOp(Var("x"), "+", Const("2")), Var("x")]
+    assert parser.feed(";") == [BinOp(Var("x"), "*", Var("x"))]
+    assert parser.feed_eof() == [None]
+
+
+def test_async():
+    g = start_separated(tll.complex_grammar, "S'")
+
+    async def parse(chunks):
+        parser = PushParser(g, token_equality)
+        tokens = async_scanner(ts.scan_complex, ts.receive(chunks))
+        return [value async for value in parse_async(parser, tokens)]
+
+    chunks = ["10 + hel", "lo - (a", " - a)"]
+    expected = parse_ast_from_tokens(g, make_scanner(ts.scan_complex, "".join(chunks)))
+    assert expected[0] and asyncio.run(parse(chunks)) == [expected[1]]
+    with pytest.raises(ParseError):
+        asyncio.run(parse(["(0 * ((1 ** (2)) * 3))"]))
@@ -1,5 +1,6 @@
 ### use pytest to test this file ###
 
+import asyncio
 import pytest
 from dataclasses import dataclass
 from regexp import *
@@ -77,6 +78,24 @@ class WhiteSpace(Token):
     pass
 
 
+number_kinds(
+    Number,
+    Identifier,
+    Operator,
+    Relation,
+    Left,
+    Right,
+    End,
+    If,
+    Then,
+    Else,
+    Return,
+    Print,
+    Assign,
+    WhiteSpace,
+)
+
+
 def test_base_case():
     scan_nothing = Scan([])
     assert list(make_scanner(scan_nothing, "")) == []
@@ -160,3 +179,30 @@ def test_complex_case():
     ]
     with pytest.raises(ScanError) as error_info:
         list(make_scanner(scan_complex, "!"))
+
+
+def test_kinds():
+    assert Token.kind == -1
+    assert [Number.kind, Identifier.kind, WhiteSpace.kind] == [0, 1, 13]
+    tokens = list(make_scanner(scan_complex, "(a + 1)"))
+    assert [t.kind for t in tokens] == [4, 1, 2, 0, 5]
+
+
+async def receive(chunks):
+    """yields the chunks like a network stream, i.e. one per event loop step"""
+    for chunk in chunks:
+        await asyncio.sleep(0)
+        yield chunk
+
+
+def test_async_scanner():
+    async def scan(chunks):
+        return [t async for t in async_scanner(scan_complex, receive(chunks))]
+
+    # tokens split between chunks are only produced once they are complete
+    chunks = ["(ret", "urn 1", "0 + ab", "c)", ""]
+    expected = list(make_scanner(scan_complex, "".join(chunks)))
+    assert asyncio.run(scan(chunks)) == expected
+    assert asyncio.run(scan([])) == []
+    with pytest.raises(ScanError):
+        asyncio.run(scan(["a", "@"]))
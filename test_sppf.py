@@ -0,0 +1,81 @@
+### use pytest to test this file ###
+
+import pytest
+from grammar import *
+from arithmetics_parser import expr_grammar, BinOp, Var
+from earley_parser import parse_from_string
+from glr_parser import parse_from_string as glr_parse_from_string
+from sppf import *
+from test_earley_parser import ambiguous_grammar
+
+# E -> E + E | E * E | E - E | x
+operator_grammar = Grammar[str, str](
+    ("E",),
+    ("x", "+", "*", "-"),
+    (
+        Production("E", (NT("E"), "+", NT("E")), lambda l, op, r: BinOp(l, op, r)),
+        Production("E", (NT("E"), "*", NT("E")), lambda l, op, r: BinOp(l, op, r)),
+        Production("E", (NT("E"), "-", NT("E")), lambda l, op, r: BinOp(l, op, r)),
+        Production("E", ("x",), lambda x: Var(x)),
+    ),
+    "E",
+)
+
+x = Var("x")
+
+
+def test_count():
+    catalan = [1, 1, 2, 5, 14, 42, 132, 429, 1430, 4862]
+    for n in range(1, 11):
+        assert (
+            count_trees(parse_from_string(ambiguous_grammar, "a" * n)) == catalan[n - 1]
+        )
+    assert count_trees(parse_from_string(expr_grammar, "x+2*x")) == 1
+
+
+def test_enumerate():
+    forest = parse_from_string(operator_grammar, "x+x*x")
+    assert set(enumerate_values(forest)) == {
+        BinOp(x, "+", BinOp(x, "*", x)),
+        BinOp(BinOp(x, "+", x), "*", x),
+    }
+    forest = glr_parse_from_string(start_separated(operator_grammar, "S'"), "x+x*x")
+    assert len(list(enumerate_values(forest))) == 2
+
+
+def test_filters():
+    forest = parse_from_string(operator_grammar, "x+x*x")
+    # + and - at the top of a tree, i.e. * binds stronger
+    precedence = priority({1: 1})
+    assert count_trees(forest, [precedence]) == 1
+    assert evaluate(forest, [precedence]) == BinOp(x, "+", BinOp(x, "*", x))
+
+    forest = parse_from_string(operator_grammar, "x-x-x")
+    assert evaluate(forest, [left_associative]) == BinOp(BinOp(x, "-", x), "-", x)
+    assert evaluate(forest, [right_associative]) == BinOp(x, "-", BinOp(x, "-", x))
+    assert count_trees(forest, [left_associative]) == 1
+
+
+def test_evaluate():
+    # no recursion limit for deep trees
+    inp = "+".join(["x"] * 600)
+    value = evaluate(parse_from_string(expr_grammar, inp))
+    depth = 0
+    while isinstance(value, BinOp):
+        value, depth = value.left, depth + 1
+    assert depth == 599
+
+    cyclic = Grammar[str, str](
+        ("S",), ("a",), (Production("S", (NT("S"),)), Production("S", ("a",))), "S"
+    )
+    with pytest.raises(Exception):
+        count_trees(parse_from_string(cyclic, "a"))
+    with pytest.raises(Exception):
+        evaluate(parse_from_string(cyclic, "a"))
+
+
+def test_enumerate_deep():
+    # no recursion limit for deep trees
+    inp = "+".join(["x"] * 300)
+    (value,) = enumerate_values(parse_from_string(expr_grammar, inp))
+    assert value == evaluate(parse_from_string(expr_grammar, inp))
@@ -0,0 +1,70 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_scanner as ts
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar, flat_expr_grammar
+from indexed_grammar import index_grammar
+from lalr_tables import lalr_table
+from lalr_tables import parse_from_string as lalr_parse_from_string
+from lr_tables import ERROR
+from profiling import Profile
+from scanner import make_scanner
+from table_compression import *
+from test_lalr_tables import assignment_grammar, comparison_grammar
+
+
+def test_pack():
+    base, values, check = pack([{0: 5, 3: 6}, {1: 7}, {}])
+    assert len(values) == 4
+    for row, entries in enumerate([{0: 5, 3: 6}, {1: 7}]):
+        for column, value in entries.items():
+            assert check[base[row] + column] == row
+            assert values[base[row] + column] == value
+
+
+def test_lookups():
+    g = start_separated(expr_grammar, "S'")
+    table = lalr_table(g)
+    profile = Profile()
+    packed = compress(table, profile)
+    assert packed.size() < sum(map(len, table.action)) + sum(map(len, table.goto))
+    assert profile.counters["LALR(1) packed entries"] == packed.size()
+    for state, row in enumerate(table.action):
+        for terminal, a in enumerate(row):
+            i = packed.action_base[state] + terminal
+            if 0 <= i < len(packed.action_check) and packed.action_check[i] == state:
+                assert packed.action_next[i] == a
+            elif a != ERROR:
+                assert packed.default_action[state] == a
+
+
+def test_parse(capfd):
+    inputs = ["x+2*(x+x)", "((x))", "x+*2", "(x", "*i=**i", "i=", "i=i=i", ""]
+    inputs += ["x<x+x", "x<x<x", "x+x<x"]
+    grammars = [start_separated(expr_grammar, "S'"), assignment_grammar]
+    grammars += [start_separated(flat_expr_grammar, "S'"), comparison_grammar]
+    for g in grammars:
+        packed = compress(lalr_table(g))
+        for inp in inputs:
+            assert parse(g, list(inp), equality, packed) == lalr_parse_from_string(
+                g, inp
+            )
+    out, err = capfd.readouterr()
+    assert "not LALR(1)" not in out
+
+
+def test_tokens():
+    g = start_separated(tll.complex_grammar, "S'")
+    parse = lambda inp: parse_from_tokens(g, list(make_scanner(ts.scan_complex, inp)))
+    assert parse("10 + hello - (a - a)")
+    assert not parse("(0 * ((1 * (2)) * 3)")
+
+
+def test_save_load(tmp_path):
+    g = start_separated(expr_grammar, "S'")
+    packed = compress(lalr_table(g))
+    path = str(tmp_path / "expr.table")
+    save(packed, path)
+    assert load(path) == packed
+    assert parse(g, list("x*(2+x)"), equality, load(path))
@@ -0,0 +1,60 @@
+### use pytest to test this file ###
+
+from grammar import *
+import test_ll_k_parser as tll
+from arithmetics_parser import expr_grammar
+from td_parser import *
+
+
+def test_memo_parse():
+    g = tll.recursive_grammar
+    for inp in ["bab", "bbab", "ab", "ba", "abb", ""]:
+        rests = list(map(tuple, parse_from_string(g, inp)))
+        assert sorted(set(rests)) == sorted(map(tuple, memo_parse_from_string(g, inp)))
+
+
+def test_left_recursion():
+    assert recognize_from_string(expr_grammar, "x+2*(x+x)*x")
+    assert not recognize_from_string(expr_grammar, "x+2*(x+x")
+    # every prefix that is an expression
+    assert end_offsets(expr_grammar, [NT("T")], "x+2*x)") == frozenset([1, 3, 5])
+
+    # A -> B a | a, B -> A b
+    indirect = Grammar[str, str](
+        ("A", "B"),
+        ("a", "b"),
+        (
+            Production("A", (NT("B"), "a")),
+            Production("A", ("a",)),
+            Production("B", (NT("A"), "b")),
+        ),
+        "A",
+    )
+    assert recognize_from_string(indirect, "ababa")
+    assert not recognize_from_string(indirect, "abab")
+
+
+def test_ambiguous():
+    # S -> S S | a has exponentially many derivations
+    g = Grammar[str, str](
+        ("S",),
+        ("a",),
+        (Production("S", (NT("S"), NT("S"))), Production("S", ("a",))),
+        "S",
+    )
+    assert end_offsets(g, [NT("S")], "a" * 40) == frozenset(range(1, 41))
+    assert not recognize_from_string(g, "a" * 20 + "b")
+
+
+def test_long_input():
+    # S -> a S | epsilon nests as deep as the input is long
+    g = Grammar[str, str](
+        ("S",),
+        ("a",),
+        (Production("S", ("a", NT("S"))), Production("S", ())),
+        "S",
+    )
+    assert recognize_from_string(g, "a" * 3000)
+    assert not recognize_from_string(g, "a" * 3000 + "b")
+    assert recognize_from_string(expr_grammar, "(" * 1000 + "x" + ")" * 1000)
+    assert recognize_from_string(expr_grammar, "+".join(["x*2"] * 1000))